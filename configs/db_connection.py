@@ -1,6 +1,10 @@
 import psycopg2
+from psycopg2 import pool
 from dotenv import load_dotenv
+from contextlib import contextmanager
 import os
+import time
+import threading
 import logging
 
 from configs.logging_config import setup_logging
@@ -21,12 +25,166 @@ class DatabaseConnection:
             "port": os.getenv("POSTGRES_PORT"),
         }
 
+        # Pool settings
+        self.pool_min = int(os.getenv("POSTGRES_POOL_MIN", "1"))
+        self.pool_max = int(os.getenv("POSTGRES_POOL_MAX", "8"))
+        self.pool_timeout = float(os.getenv("POSTGRES_POOL_TIMEOUT", "30"))
+        self.max_lifetime = float(os.getenv("POSTGRES_POOL_MAX_LIFETIME", "1800"))
+        self.health_check_after = float(os.getenv("POSTGRES_POOL_HEALTH_CHECK_AFTER", "30"))
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.pool_max)
+        self._created_at = {}
+        self._last_used = {}
+        self._local = threading.local()
+
     def get_connection(self):
         """
         Get a connection to the database.
         """
         return psycopg2.connect(**self.connection_params)
 
+    def _get_pool(self) -> pool.ThreadedConnectionPool:
+        """Create the connection pool on first use"""
+
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = pool.ThreadedConnectionPool(
+                        self.pool_min, self.pool_max, **self.connection_params
+                    )
+                    logger.info(f"Created connection pool (min={self.pool_min}, max={self.pool_max})")
+        return self._pool
+
+    def _is_healthy(self, conn) -> bool:
+        """Check that a pooled connection is open, young enough and responsive"""
+
+        if conn.closed:
+            return False
+
+        now = time.monotonic()
+        if now - self._created_at.setdefault(id(conn), now) > self.max_lifetime:
+            return False
+
+        # Only ping connections that have been idle for a while
+        if now - self._last_used.get(id(conn), now) > self.health_check_after:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+            except Exception:
+                return False
+
+        return True
+
+    def _discard(self, conn):
+        """Close a connection and remove it from the pool"""
+
+        self._created_at.pop(id(conn), None)
+        self._last_used.pop(id(conn), None)
+        try:
+            self._get_pool().putconn(conn, close=True)
+        except Exception as e:
+            logger.warning(f"Error discarding pooled connection: {str(e)}")
+
+    def acquire(self):
+        """
+        Check out a connection from the pool, blocking up to pool_timeout
+        seconds when all connections are in use.
+        """
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise pool.PoolError(f"Timed out waiting for a database connection after {self.pool_timeout}s")
+
+        try:
+            pg_pool = self._get_pool()
+            conn = pg_pool.getconn()
+            while not self._is_healthy(conn):
+                logger.info("Recycling stale database connection")
+                self._discard(conn)
+                conn = pg_pool.getconn()
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, close: bool = False):
+        """Return a connection to the pool"""
+
+        try:
+            if close or conn.closed:
+                self._discard(conn)
+            else:
+                if conn.status != psycopg2.extensions.STATUS_READY:
+                    conn.rollback()
+                self._last_used[id(conn)] = time.monotonic()
+                self._get_pool().putconn(conn)
+        except Exception as e:
+            logger.warning(f"Error releasing pooled connection: {str(e)}")
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Unit of work over a pooled connection.
+
+        The outermost block checks out a connection and commits on success or
+        rolls back on error. Nested blocks in the same thread reuse that
+        connection inside a savepoint, so a failing inner block only undoes
+        its own work.
+
+        Usage:
+            with db.transaction() as conn:
+                cursor = conn.cursor()
+                ...
+        """
+        conn = getattr(self._local, "conn", None)
+
+        if conn is not None:
+            self._local.depth += 1
+            savepoint = f"sp_{self._local.depth}"
+            cursor = conn.cursor()
+            cursor.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield conn
+                cursor.execute(f"RELEASE SAVEPOINT {savepoint}")
+            except Exception:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                raise
+            finally:
+                cursor.close()
+                self._local.depth -= 1
+            return
+
+        conn = self.acquire()
+        self._local.conn = conn
+        self._local.depth = 0
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            self._local.conn = None
+            self.release(conn, close=broken or conn.closed)
+
+    def close_pool(self):
+        """Close all pooled connections"""
+
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+                self._created_at.clear()
+                self._last_used.clear()
+
     def test_connection(self):
         """Test database connection"""
         try:
@@ -50,4 +208,4 @@ if __name__ == "__main__":
     if db.test_connection():
         print("Database connection successful")
     else:
-        print("Database connection failed")
\ No newline at end of file
+        print("Database connection failed")
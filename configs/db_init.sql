@@ -1,27 +1,55 @@
 -- Reddit posts with sentiment analysis
+-- Range partitioned by month on created_utc; monthly partitions are created
+-- by the load path (DatabaseOperations.ensure_partitions) as posts arrive.
 CREATE TABLE IF NOT EXISTS reddit_posts (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
+    reddit_id VARCHAR(20),
     title TEXT,
     body TEXT,
     subreddit VARCHAR(50) NOT NULL,
     post_score INTEGER,
     comment_count INTEGER,
-    created_utc TIMESTAMP,
-    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    created_utc TIMESTAMP NOT NULL,
+    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_utc)
+) PARTITION BY RANGE (created_utc);
 
 
 -- Ticker symbols mentioned in Reddit posts and their sentiment
+-- created_utc is copied from the post so mentions share its partitioning
 CREATE TABLE IF NOT EXISTS ticker_mentions (
-    id SERIAL PRIMARY KEY,
-    post_id INTEGER REFERENCES reddit_posts(id) ON DELETE CASCADE,
+    id SERIAL,
+    post_id INTEGER NOT NULL,
+    created_utc TIMESTAMP NOT NULL,
     ticker VARCHAR(10) NOT NULL,
     sentiment_label VARCHAR(20) NOT NULL,
     sentiment_score DECIMAL(3,2),
     context TEXT,
-    UNIQUE(post_id, ticker)
+    PRIMARY KEY (id, created_utc),
+    UNIQUE(post_id, ticker, created_utc),
+    FOREIGN KEY (post_id, created_utc) REFERENCES reddit_posts(id, created_utc) ON DELETE CASCADE
+) PARTITION BY RANGE (created_utc);
+
+-- Catch-alls so a missing monthly partition never fails an insert
+CREATE TABLE IF NOT EXISTS reddit_posts_default PARTITION OF reddit_posts DEFAULT;
+CREATE TABLE IF NOT EXISTS ticker_mentions_default PARTITION OF ticker_mentions DEFAULT;
+
+-- Daily per-ticker aggregates of partitions dropped by retention
+-- (see DatabaseOperations.drop_old_partitions)
+CREATE TABLE IF NOT EXISTS ticker_daily_rollup (
+    ticker VARCHAR(10) NOT NULL,
+    day DATE NOT NULL,
+    mention_count BIGINT NOT NULL,
+    score_sum NUMERIC NOT NULL,
+    positive_count BIGINT NOT NULL,
+    negative_count BIGINT NOT NULL,
+    neutral_count BIGINT NOT NULL,
+    PRIMARY KEY (ticker, day)
 );
 
+-- One row per distinct article; ticker is the one it was first fetched for.
+-- content_hash is the md5 of the URL (or of title/source/published_at when
+-- there is none), see DatabaseOperations.bulk_insert_news
 CREATE TABLE IF NOT EXISTS news_articles (
     id SERIAL PRIMARY KEY,
     ticker VARCHAR(10) NOT NULL,
@@ -31,9 +59,25 @@ CREATE TABLE IF NOT EXISTS news_articles (
     source VARCHAR(100),
     published_at TIMESTAMP,
     content TEXT,
+    content_hash VARCHAR(32) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Every ticker an article was returned for, so articles mentioning several symbols are stored once
+CREATE TABLE IF NOT EXISTS news_article_tickers (
+    article_id INTEGER NOT NULL REFERENCES news_articles(id) ON DELETE CASCADE,
+    ticker VARCHAR(10) NOT NULL,
+    PRIMARY KEY (article_id, ticker)
+);
+
+-- Per-subreddit high-water mark for incremental extraction
+CREATE TABLE IF NOT EXISTS reddit_cursors (
+    subreddit VARCHAR(50) PRIMARY KEY,
+    last_fullname VARCHAR(20),
+    last_created_utc DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 CREATE TABLE IF NOT EXISTS stock_data (
     id SERIAL PRIMARY KEY,
     ticker VARCHAR(10) NOT NULL,
@@ -47,8 +91,8 @@ CREATE TABLE IF NOT EXISTS stock_data (
     UNIQUE(ticker, date)
 );
 
--- Indexes
-CREATE INDEX idx_ticker_mentions_ticker
+-- Indexes (created on the partitioned parents, so every partition gets them)
+CREATE INDEX IF NOT EXISTS idx_ticker_mentions_ticker
   ON ticker_mentions(ticker);
 
 CREATE INDEX IF NOT EXISTS idx_ticker_mentions_post_id
@@ -60,8 +104,47 @@ CREATE INDEX IF NOT EXISTS idx_reddit_posts_subreddit
 CREATE INDEX IF NOT EXISTS idx_reddit_posts_created_utc
   ON reddit_posts(created_utc);
 
+CREATE UNIQUE INDEX IF NOT EXISTS idx_news_articles_content_hash
+  ON news_articles(content_hash);
+
+-- Latest stored article per ticker (DatabaseOperations.get_latest_news_dates)
+CREATE INDEX IF NOT EXISTS idx_news_article_tickers_ticker
+  ON news_article_tickers(ticker);
 
--- Materialized view for ticker mentions
+-- One row per Reddit post; used to skip already-processed posts.
+-- Unique indexes on a partitioned table must include the partition key;
+-- a post's created_utc never changes, so this still identifies it.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_reddit_posts_reddit_id
+  ON reddit_posts(reddit_id, created_utc);
+
+
+-- Per-ticker mention aggregates, maintained incrementally by the load path
+-- (see DatabaseOperations.bulk_load_reddit_data / rebuild_ticker_stats)
+CREATE TABLE IF NOT EXISTS ticker_mention_stats (
+    ticker VARCHAR(10) PRIMARY KEY,
+    mention_count BIGINT NOT NULL DEFAULT 0,
+    score_sum NUMERIC NOT NULL DEFAULT 0,
+    positive_count BIGINT NOT NULL DEFAULT 0,
+    negative_count BIGINT NOT NULL DEFAULT 0,
+    neutral_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_ticker_mention_stats_mention_count
+  ON ticker_mention_stats(mention_count DESC);
+
+
+-- Bumped after each pipeline run; dashboard caches are keyed on it (see load/dashboard.py)
+CREATE TABLE IF NOT EXISTS data_version (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_version (id) VALUES (1) ON CONFLICT DO NOTHING;
+
+
+-- Materialized view for ticker mentions (full recompute; kept as a fallback for ticker_mention_stats)
 CREATE MATERIALIZED VIEW IF NOT EXISTS mv_ticker_mentions AS
 SELECT
     ticker,
@@ -72,20 +155,29 @@ SELECT
     SUM(CASE WHEN sentiment_label = 'neutral' THEN 1 ELSE 0 END) AS neutral_count
 FROM ticker_mentions
 GROUP BY ticker
-LIMIT 10;
 WITH NO DATA;
 
+-- Required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_ticker_mentions_ticker
+  ON mv_ticker_mentions(ticker);
+
 
 -- View for daily sentiment trends
-CREATE VIEW IF NOT EXISTS view_daily_sentiment_trends AS
+-- Reads the denormalized created_utc on mentions (no join to reddit_posts) and
+-- includes days whose partitions were rolled up. Filter on created_utc directly
+-- (DatabaseOperations.get_daily_sentiment_trends) to prune to recent partitions.
+CREATE OR REPLACE VIEW view_daily_sentiment_trends AS
 SELECT
-    t.ticker,
-    date_trunc('day', p.created_utc) AS day,
+    ticker,
+    date_trunc('day', created_utc) AS day,
     COUNT(*) AS mention_count,
-    ROUND(AVG(t.sentiment_score), 2) AS avg_sentiment_score
-FROM ticker_mentions t
-JOIN reddit_posts p ON t.post_id = p.id
-GROUP BY t.ticker, day;
-
-
--- REFRESH MATERIALIZED VIEW CONCURRENTLY mv_ticker_mentions;
\ No newline at end of file
+    ROUND(AVG(sentiment_score), 2) AS avg_sentiment_score
+FROM ticker_mentions
+GROUP BY ticker, day
+UNION ALL
+SELECT
+    ticker,
+    day::TIMESTAMP AS day,
+    mention_count,
+    ROUND(score_sum / NULLIF(mention_count, 0), 2) AS avg_sentiment_score
+FROM ticker_daily_rollup;
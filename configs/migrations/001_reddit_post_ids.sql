@@ -0,0 +1,28 @@
+-- Track Reddit post ids so already-processed posts are skipped.
+--
+-- Adds reddit_id to a reddit_posts table created before it existed, deletes
+-- duplicate rows of the same Reddit post (keeping the oldest; their ticker
+-- mentions go with them through ON DELETE CASCADE) and creates the unique
+-- index that the loaders' ON CONFLICT (reddit_id, created_utc) needs.
+-- Posts stored before this change have no reddit_id and are left alone.
+-- Works on plain and partitioned tables; safe to re-run. Run it before
+-- 002_partition_reddit_tables.sql.
+--
+--   docker compose exec -T postgres psql -v ON_ERROR_STOP=1 -U <user> -d <db> < configs/migrations/001_reddit_post_ids.sql
+
+BEGIN;
+
+ALTER TABLE reddit_posts ADD COLUMN IF NOT EXISTS reddit_id VARCHAR(20);
+
+DELETE FROM reddit_posts a
+USING reddit_posts b
+WHERE a.reddit_id = b.reddit_id
+  AND a.id > b.id;
+
+-- An earlier index on reddit_id alone would not match the ON CONFLICT target
+DROP INDEX IF EXISTS idx_reddit_posts_reddit_id;
+
+CREATE UNIQUE INDEX idx_reddit_posts_reddit_id
+  ON reddit_posts(reddit_id, created_utc);
+
+COMMIT;
@@ -0,0 +1,103 @@
+-- Convert reddit_posts / ticker_mentions to monthly range partitions on created_utc.
+--
+-- db_init.sql only runs when the Postgres volume is first created, so a
+-- database set up before partitioning still has plain tables with
+-- id-only primary keys. This renames them, creates the partitioned tables,
+-- copies every row across (ticker_mentions gets created_utc from its post),
+-- re-creates the (post_id, created_utc) foreign key and drops the old tables,
+-- all in one transaction. Fails without changing anything if reddit_posts is
+-- already partitioned.
+--
+-- Run with the pipeline paused, then re-run db_init.sql to re-create the
+-- indexes and views (see README, "Upgrading an existing database"):
+--   docker compose exec -T postgres psql -v ON_ERROR_STOP=1 -U <user> -d <db> < configs/migrations/002_partition_reddit_tables.sql
+
+BEGIN;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'reddit_posts'::regclass) THEN
+        RAISE EXCEPTION 'reddit_posts is already partitioned, nothing to migrate';
+    END IF;
+END $$;
+
+-- Both depend on the old tables; db_init.sql re-creates them
+DROP MATERIALIZED VIEW IF EXISTS mv_ticker_mentions;
+DROP VIEW IF EXISTS view_daily_sentiment_trends;
+
+ALTER TABLE reddit_posts ADD COLUMN IF NOT EXISTS reddit_id VARCHAR(20);
+
+-- The partition key must be set; fall back to when the post was stored
+UPDATE reddit_posts
+SET created_utc = COALESCE(processed_at, CURRENT_TIMESTAMP)
+WHERE created_utc IS NULL;
+
+ALTER TABLE ticker_mentions RENAME TO ticker_mentions_old;
+ALTER TABLE reddit_posts RENAME TO reddit_posts_old;
+ALTER TABLE ticker_mentions_old RENAME CONSTRAINT ticker_mentions_pkey TO ticker_mentions_old_pkey;
+ALTER TABLE reddit_posts_old RENAME CONSTRAINT reddit_posts_pkey TO reddit_posts_old_pkey;
+
+-- Same definitions as db_init.sql, reusing the existing id sequences so ids keep counting up
+CREATE TABLE reddit_posts (
+    id INTEGER NOT NULL DEFAULT nextval('reddit_posts_id_seq'),
+    reddit_id VARCHAR(20),
+    title TEXT,
+    body TEXT,
+    subreddit VARCHAR(50) NOT NULL,
+    post_score INTEGER,
+    comment_count INTEGER,
+    created_utc TIMESTAMP NOT NULL,
+    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_utc)
+) PARTITION BY RANGE (created_utc);
+
+CREATE TABLE ticker_mentions (
+    id INTEGER NOT NULL DEFAULT nextval('ticker_mentions_id_seq'),
+    post_id INTEGER NOT NULL,
+    created_utc TIMESTAMP NOT NULL,
+    ticker VARCHAR(10) NOT NULL,
+    sentiment_label VARCHAR(20) NOT NULL,
+    sentiment_score DECIMAL(3,2),
+    context TEXT,
+    PRIMARY KEY (id, created_utc),
+    UNIQUE(post_id, ticker, created_utc),
+    FOREIGN KEY (post_id, created_utc) REFERENCES reddit_posts(id, created_utc) ON DELETE CASCADE
+) PARTITION BY RANGE (created_utc);
+
+ALTER SEQUENCE reddit_posts_id_seq OWNED BY reddit_posts.id;
+ALTER SEQUENCE ticker_mentions_id_seq OWNED BY ticker_mentions.id;
+
+CREATE TABLE reddit_posts_default PARTITION OF reddit_posts DEFAULT;
+CREATE TABLE ticker_mentions_default PARTITION OF ticker_mentions DEFAULT;
+
+-- One partition per month that has data, named like DatabaseOperations.ensure_partitions does
+DO $$
+DECLARE
+    month DATE;
+BEGIN
+    FOR month IN SELECT DISTINCT date_trunc('month', created_utc)::DATE FROM reddit_posts_old LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF reddit_posts FOR VALUES FROM (%L) TO (%L)',
+            'reddit_posts_p' || to_char(month, 'YYYYMM'), month, (month + INTERVAL '1 month')::DATE
+        );
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF ticker_mentions FOR VALUES FROM (%L) TO (%L)',
+            'ticker_mentions_p' || to_char(month, 'YYYYMM'), month, (month + INTERVAL '1 month')::DATE
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO reddit_posts (id, reddit_id, title, body, subreddit, post_score, comment_count, created_utc, processed_at)
+SELECT id, reddit_id, title, body, subreddit, post_score, comment_count, created_utc, processed_at
+FROM reddit_posts_old;
+
+-- Mentions without a post could never be shown; they are not carried over
+INSERT INTO ticker_mentions (id, post_id, created_utc, ticker, sentiment_label, sentiment_score, context)
+SELECT m.id, m.post_id, p.created_utc, m.ticker, m.sentiment_label, m.sentiment_score, m.context
+FROM ticker_mentions_old m
+JOIN reddit_posts_old p ON p.id = m.post_id;
+
+DROP TABLE ticker_mentions_old;
+DROP TABLE reddit_posts_old;
+
+COMMIT;
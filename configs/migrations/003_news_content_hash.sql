@@ -0,0 +1,56 @@
+-- Deduplicate news_articles on content_hash and link articles to tickers.
+--
+-- Adds content_hash to a news_articles table created before it existed,
+-- backfills it the way DatabaseOperations._article_hash computes it (md5 of
+-- the URL without a trailing slash, or of title|source|published_at), links
+-- every article to the tickers it was stored for, keeps the oldest row of
+-- each duplicate group and only then adds the unique index. Safe to re-run.
+--
+-- Articles without a URL stored their published_at as a timestamp, not the
+-- API's string, so their backfilled hash may not match a later fetch; such
+-- an article can be stored once more, after which the index holds.
+--
+--   docker compose exec -T postgres psql -v ON_ERROR_STOP=1 -U <user> -d <db> < configs/migrations/003_news_content_hash.sql
+
+BEGIN;
+
+ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS content_hash VARCHAR(32);
+
+UPDATE news_articles
+SET content_hash = md5(COALESCE(
+    NULLIF(rtrim(btrim(url), '/'), ''),
+    title || '|' || COALESCE(source, '') || '|' || COALESCE(published_at::TEXT, '')
+))
+WHERE content_hash IS NULL;
+
+CREATE TABLE IF NOT EXISTS news_article_tickers (
+    article_id INTEGER NOT NULL REFERENCES news_articles(id) ON DELETE CASCADE,
+    ticker VARCHAR(10) NOT NULL,
+    PRIMARY KEY (article_id, ticker)
+);
+
+-- Every ticker a duplicate was stored for is moved onto the row that is kept
+INSERT INTO news_article_tickers (article_id, ticker)
+SELECT keep.id, a.ticker
+FROM news_articles a
+JOIN (
+    SELECT content_hash, MIN(id) AS id
+    FROM news_articles
+    GROUP BY content_hash
+) keep ON keep.content_hash = a.content_hash
+ON CONFLICT DO NOTHING;
+
+DELETE FROM news_articles a
+USING news_articles b
+WHERE a.content_hash = b.content_hash
+  AND a.id > b.id;
+
+ALTER TABLE news_articles ALTER COLUMN content_hash SET NOT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_news_articles_content_hash
+  ON news_articles(content_hash);
+
+CREATE INDEX IF NOT EXISTS idx_news_article_tickers_ticker
+  ON news_article_tickers(ticker);
+
+COMMIT;
@@ -9,13 +9,31 @@ CLIENT_ID = os.getenv("CLIENT_ID")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 USER_AGENT = os.getenv("CLIENT_USER_AGENT")
 
-# Initialize PRAW
-reddit = praw.Reddit(
-    client_id=CLIENT_ID,
-    client_secret=CLIENT_SECRET,
-    user_agent=USER_AGENT
-)
+
+def create_reddit() -> praw.Reddit:
+    """
+    Create a new PRAW client.
+
+    PRAW instances are not thread-safe, so each worker thread should use its own.
+    """
+    return praw.Reddit(
+        client_id=CLIENT_ID,
+        client_secret=CLIENT_SECRET,
+        user_agent=USER_AGENT
+    )
+
+
+_reddit = None
+
+
+def get_reddit() -> praw.Reddit:
+    """Shared PRAW client for the main thread, created on first use"""
+    global _reddit
+    if _reddit is None:
+        _reddit = create_reddit()
+    return _reddit
+
 
 if __name__ == "__main__":
     # Test the connection
-    print(reddit.read_only)
\ No newline at end of file
+    print(get_reddit().read_only)
@@ -1,15 +1,19 @@
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional
 import time
 import sys
+import os
+import pandas as pd
 
 sys.path.insert(0, '/opt/airflow')
 
-from extract.reddit_data import get_subreddit_data
-from extract.daily_stock_data import get_daily_stock_data
+from extract.reddit_data import stream_subreddits
+from extract.daily_stock_data import get_daily_stock_batch, plan_stock_fetch, stock_frame_to_dict
 from extract.news_data import get_news_for_ticker
-from transform.sentiment import get_ticker_sentiment
+from extract.fetch_engine import fetch_engine
+from transform.sentiment import get_ticker_sentiment, get_ticker_sentiment_batch
+from transform.sentiment_cache import sentiment_cache
 from load.db_operations import db_ops
 from configs.logging_config import setup_logging
 
@@ -20,103 +24,180 @@ logger = logging.getLogger(__name__)
 class RedditDataPipeline:
     def __init__(self):
         self.subreddits = ["investing", "wallstreetbets", "stocks"]
-        self.post_limit = 10
+        self.post_limit = 1000
+        self.post_chunk_size = 100
+        self.initial_lookback_hours = 24
         self.news_limit = 5
         self.stock_days = 30
         self.top_tickers_limit = 10
+
+        # Shard sizes for dynamic task mapping in the DAG
+        self.ticker_chunk_size = int(os.getenv("TICKER_CHUNK_SIZE", "25"))
+        self.post_batch_size = int(os.getenv("POST_BATCH_SIZE", "500"))
     
-    def extract_reddit_data(self) -> List[Dict[str, Any]]:
-        """Extract Reddit data and return serializable dictionaries"""
+    def extract_reddit_data(self, sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        Extract every Reddit post created since the last run and return serializable dictionaries.
+
+        Each subreddit's `new` listing is streamed concurrently down to its stored
+        high-water mark. The new marks of subreddits that succeeded are returned
+        alongside the posts, not saved: pass them to load_reddit_data so they only
+        advance once the posts are stored.
+
+        With a `sink` (e.g. an intermediate store writer's append), each chunk is
+        handed to it as it arrives instead of being collected, and the returned
+        post list is empty.
+        """
         
         all_posts = []
-        for subreddit in self.subreddits:
-            try:
-                logger.info(f"Extracting posts from r/{subreddit}")
-
-                posts = get_subreddit_data(subreddit, self.post_limit)
-                posts_list = list(posts)
-                
-                # Convert PRAW objects to serializable dictionaries
-                for post in posts_list:
-                    post_dict = {
-                        'id': post.id,
-                        'title': post.title,
-                        'selftext': getattr(post, 'selftext', ''),
-                        'subreddit': str(post.subreddit),
-                        'score': getattr(post, 'score', 0),
-                        'num_comments': getattr(post, 'num_comments', 0),
-                        'created_utc': post.created_utc,
-                        'url': post.url,
-                        'author': str(post.author) if post.author else '[deleted]'
-                    }
-                    all_posts.append(post_dict)
-                    
-                logger.info(f"Extracted {len(posts_list)} posts from r/{subreddit}")
-            except Exception as e:
-                logger.error(f"Error extracting posts from r/{subreddit}: {str(e)}")
-
-        logger.info(f"Extracted {len(all_posts)} posts from all subreddits")
-        return all_posts
-
-    def extract_news_data(self, tickers: List[str]) -> Dict[str, List[Dict[str, Any]]]:
-        """Extract news data for all mentioned tickers"""
+        total = 0
+        stored = db_ops.get_reddit_cursors(self.subreddits)
+
+        # First run for a subreddit: only look back a limited window
+        default_after = time.time() - self.initial_lookback_hours * 3600
+        after = {
+            subreddit: stored[subreddit]['last_created_utc'] if subreddit in stored else default_after
+            for subreddit in self.subreddits
+        }
+
+        new_marks = {}
+        failed = set()
+        counts = {subreddit: 0 for subreddit in self.subreddits}
+
+        for subreddit, chunk in stream_subreddits(after, self.post_chunk_size, self.post_limit):
+            if chunk is None:
+                failed.add(subreddit)
+                continue
+
+            if sink is not None:
+                sink(chunk)
+            else:
+                all_posts.extend(chunk)
+            counts[subreddit] += len(chunk)
+            total += len(chunk)
+
+            # Posts arrive newest first, so the newest post seen so far sets the mark
+            newest = max(chunk, key=lambda post: post['created_utc'])
+            mark = new_marks.get(subreddit)
+            if mark is None or newest['created_utc'] > mark['last_created_utc']:
+                new_marks[subreddit] = {
+                    'last_fullname': newest['fullname'],
+                    'last_created_utc': newest['created_utc'],
+                }
+
+        for subreddit, count in counts.items():
+            if subreddit not in failed:
+                logger.info(f"Extracted {count} posts from r/{subreddit}")
+
+        reddit_cursors = {subreddit: mark for subreddit, mark in new_marks.items() if subreddit not in failed}
+
+        logger.info(f"Extracted {total} posts from all subreddits")
+        return all_posts, reddit_cursors
+
+    def extract_news_data(self, tickers: List[str], shards: int = 1) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Extract news data for all mentioned tickers.
+
+        `shards` is how many extraction processes share the NewsAPI quota right now.
+        """
         
         news_data = {}
-        
-        for ticker in tickers:
-            try:
-                logger.info(f"Extracting news for {ticker}")
-                articles = get_news_for_ticker(ticker, page_size=self.news_limit)
-                
-                if articles:
-                    news_data[ticker] = articles
-                    logger.info(f"Extracted {len(articles)} news articles for {ticker}")
-                else:
-                    logger.warning(f"No news articles found for {ticker}")
-                    
-            except Exception as e:
-                logger.error(f"Error extracting news for {ticker}: {str(e)}")
+        fetch_engine.set_shards("newsapi", shards)
+
+        # Only ask for articles newer than what is stored; articles at the boundary are deduplicated on load
+        latest_dates = db_ops.get_latest_news_dates(tickers)
+
+        # Fetch concurrently; the fetch engine applies NewsAPI rate limits
+        results = fetch_engine.map(
+            lambda ticker: get_news_for_ticker(ticker, page_size=self.news_limit, since=latest_dates.get(ticker)),
+            tickers
+        )
+
+        for ticker, articles in zip(tickers, results):
+            if articles:
+                news_data[ticker] = articles
+                logger.info(f"Extracted {len(articles)} news articles for {ticker}")
+            else:
+                logger.warning(f"No news articles found for {ticker}")
         
         logger.info(f"Extracted news for {len(news_data)} tickers")
         return news_data
     
-    def extract_stock_data(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
-        """Extract stock data for all mentioned tickers"""
+    def extract_stock_data(self, tickers: List[str], shards: int = 1) -> pd.DataFrame:
+        """
+        Extract stock data for all mentioned tickers as one columnar frame.
+
+        `shards` is how many extraction processes share the Alpha Vantage quota right now.
+        """
+        fetch_engine.set_shards("alpha_vantage", shards)
+
+        # Only fetch what is missing from the database
+        latest_dates = db_ops.get_latest_stock_dates(tickers)
+        plans = {ticker: plan_stock_fetch(latest_dates.get(ticker)) for ticker in tickers}
+        to_fetch = [ticker for ticker, output_size in plans.items() if output_size]
+
+        skipped = len(tickers) - len(to_fetch)
+        if skipped:
+            logger.info(f"Stock data already current for {skipped} tickers")
+
+        # The fetch engine spreads the per-ticker requests over the Alpha Vantage quota.
+        # The latest stored day is re-fetched so late corrections are picked up.
+        stock_frame = get_daily_stock_batch(
+            to_fetch,
+            output_size={ticker: plans[ticker] for ticker in to_fetch},
+            since=latest_dates
+        )
+
+        days = stock_frame.groupby("ticker", sort=False).size()
+        for ticker in to_fetch:
+            if ticker in days:
+                logger.info(f"Extracted stock data for {ticker} ({days[ticker]} days, {plans[ticker]})")
+            else:
+                logger.warning(f"No stock data found for {ticker}")
         
-        stock_data = {}
-        
-        for ticker in tickers:
-            try:
-                logger.info(f"Extracting stock data for {ticker}")
-                data = get_daily_stock_data(ticker, output_size="compact")
-                
-                if data:
-                    stock_data[ticker] = data
-                    logger.info(f"Extracted stock data for {ticker} ({len(data['daily_data'])} days)")
-                else:
-                    logger.warning(f"No stock data found for {ticker}")
-                    
-            except Exception as e:
-                logger.error(f"Error extracting stock data for {ticker}: {str(e)}")
-        
-        logger.info(f"Extracted stock data for {len(stock_data)} tickers")
-        return stock_data
+        logger.info(f"Extracted stock data for {len(days)} tickers")
+        return stock_frame
     
     def transform_sentiment(self, posts_dicts: List[Dict[str, Any]]) -> tuple[List[Dict[str, Any]], List[str]]:
-        """Transform Reddit data from dictionaries into sentiment analysis and collect unique tickers"""
+        """
+        Transform Reddit data from dictionaries into sentiment analysis and collect unique tickers.
+
+        Raises if any post could not be scored, so the batch is retried rather
+        than loaded with posts missing (which would advance the subreddit
+        cursors past them).
+        """
 
         transformed_posts = []
+        failed = 0
         all_tickers = set()
+        sentiment_cache.reset_stats()
 
+        # Skip posts that were already loaded before doing any FinBERT work
+        existing_ids = db_ops.get_existing_reddit_ids([post['id'] for post in posts_dicts])
+        if existing_ids:
+            posts_dicts = [post for post in posts_dicts if post['id'] not in existing_ids]
+            logger.info(f"Skipping {len(existing_ids)} already processed posts")
+
+        # Combine title and body for context
+        texts = []
         for post_dict in posts_dicts:
+            text = post_dict['title']
+            if post_dict.get('selftext'):
+                text += f"\n\n{post_dict['selftext']}"
+            texts.append(text)
+
+        # Score all posts in one batched pass; fall back to per-post scoring on failure
+        try:
+            batch_sentiments = get_ticker_sentiment_batch(texts)
+        except Exception as e:
+            logger.error(f"Batched sentiment analysis failed, falling back to per-post: {str(e)}")
+            batch_sentiments = [None] * len(texts)
+
+        for post_dict, text, ticker_sentiments in zip(posts_dicts, texts, batch_sentiments):
             try:
-                # Combine title and body for context
-                text = post_dict['title']
-                if post_dict.get('selftext'):
-                    text += f"\n\n{post_dict['selftext']}"
-                
                 # Extract tickers and sentiment
-                ticker_sentiments = get_ticker_sentiment(text)
+                if ticker_sentiments is None:
+                    ticker_sentiments = get_ticker_sentiment(text)
                 
                 if ticker_sentiments:
                     # Collect unique tickers
@@ -124,6 +205,7 @@ class RedditDataPipeline:
                     
                     # Prepare post data
                     post_data = {
+                        'reddit_id': post_dict['id'],
                         'title': post_dict['title'],
                         'body': post_dict.get('selftext', ''),
                         'subreddit': post_dict['subreddit'],
@@ -137,79 +219,154 @@ class RedditDataPipeline:
                     logger.info(f"Transformed post: {post_dict['title'][:50]}... with {len(ticker_sentiments)} tickers")
             
             except Exception as e:
+                failed += 1
                 logger.error(f"Error transforming post {post_dict.get('id', 'unknown')}: {str(e)}")
 
+        if failed:
+            raise RuntimeError(f"Sentiment analysis failed for {failed} of {len(posts_dicts)} posts")
+
         logger.info(f"Transformed {len(transformed_posts)} posts with {len(all_tickers)} unique tickers")
+        logger.info(f"Sentiment cache stats: {sentiment_cache.stats()}")
         return transformed_posts, list(all_tickers)
 
-    def load_reddit_data(self, transformed_posts: List[Dict[str, Any]]) -> int:
-        """Load transformed Reddit data and ticker mentions data to respective database tables"""
+    def shard_tickers(self, tickers: List[str]) -> List[List[str]]:
+        """Split tickers into chunks of ticker_chunk_size for parallel extraction"""
+
+        tickers = sorted(tickers)
+        size = max(1, self.ticker_chunk_size)
+        return [tickers[i:i + size] for i in range(0, len(tickers), size)]
+
+    def shard_posts(self, post_count: int) -> List[Dict[str, int]]:
+        """Split post_count rows into (offset, length) batches of post_batch_size"""
+
+        size = max(1, self.post_batch_size)
+        return [
+            {'offset': offset, 'length': min(size, post_count - offset)}
+            for offset in range(0, post_count, size)
+        ]
+
+    def load_reddit_data(self, transformed_posts: List[Dict[str, Any]], reddit_cursors: Optional[Dict[str, Dict[str, Any]]] = None) -> int:
+        """
+        Load transformed Reddit data and ticker mentions data to respective database tables.
+
+        `reddit_cursors` (from extract_reddit_data) are advanced in the same
+        transaction as the posts, so a failed load leaves them where they were.
+        """
+
+        if not transformed_posts:
+            db_ops.update_reddit_cursors(reddit_cursors or {})
+            return 0
+
+        # Stage everything with COPY and merge in a single transaction
+        post_ids = db_ops.bulk_load_reddit_data(transformed_posts, reddit_cursors)
+
+        if post_ids is not None:
+            loaded_count = sum(1 for post_id in post_ids if post_id is not None)
+            logger.info(f"Bulk loaded {loaded_count} posts")
+            return loaded_count
+
+        logger.warning("Bulk load failed, falling back to row-by-row inserts")
+        return self._load_reddit_data_rowwise(transformed_posts, reddit_cursors)
+
+    def _load_reddit_data_rowwise(self, transformed_posts: List[Dict[str, Any]], reddit_cursors: Optional[Dict[str, Dict[str, Any]]] = None) -> int:
+        """Load posts one at a time, skipping any that fail"""
 
         loaded_count = 0
         
-        for post in transformed_posts:
-            try:
-                # Extract ticker sentiments for separate insertion
-                ticker_sentiments = post.pop('ticker_sentiments', {})
+        try:
+            # Partition DDL runs up front, outside the shared transaction
+            db_ops.ensure_partitions(post['created_utc'] for post in transformed_posts)
 
-                # Insert post data
-                post_id = db_ops.insert_reddit_data(post)
+            # Share one connection and commit all posts in a single transaction
+            with db_ops.transaction():
+                for post in transformed_posts:
+                    try:
+                        # Extract ticker sentiments for separate insertion
+                        ticker_sentiments = post.get('ticker_sentiments', {})
 
-                if post_id:
-                    # Insert ticker mentions
-                    success = db_ops.insert_ticker_mentions(post_id, ticker_sentiments)
+                        # Insert post data
+                        post_id = db_ops.insert_reddit_data(post)
 
-                    if success:
-                        loaded_count += 1
-                        logger.info(f"Loaded post {post_id} with {len(ticker_sentiments)} ticker mentions")
-                    else:
-                        logger.error(f"Failed to load ticker mentions for post {post_id}")
-                else:
-                    logger.error(f"Failed to insert post {post['title'][:50]}...")
+                        if post_id:
+                            # Insert ticker mentions
+                            success = db_ops.insert_ticker_mentions(post_id, ticker_sentiments, post['created_utc'])
 
-            except Exception as e:
-                logger.error(f"Error loading post data: {str(e)}")
+                            if success:
+                                loaded_count += 1
+                                logger.info(f"Loaded post {post_id} with {len(ticker_sentiments)} ticker mentions")
+                            else:
+                                logger.error(f"Failed to load ticker mentions for post {post_id}")
+                        else:
+                            logger.error(f"Failed to insert post {post['title'][:50]}...")
+
+                    except Exception as e:
+                        logger.error(f"Error loading post data: {str(e)}")
+
+                db_ops.update_reddit_cursors(reddit_cursors or {})
+
+        except Exception as e:
+            logger.error(f"Error committing Reddit data: {str(e)}")
+            return 0
 
         return loaded_count
 
     def load_news_data(self, news_data: Dict[str, List[Dict[str, Any]]]) -> int:
         """Load news data to database"""
         
-        loaded_count = 0
-        
-        for ticker, articles in news_data.items():
-            try:
-                success = db_ops.insert_news_articles(ticker, articles)
-                
-                if success:
-                    loaded_count += 1
-                    logger.info(f"Loaded {len(articles)} news articles for {ticker}")
-                else:
-                    logger.error(f"Failed to load news articles for {ticker}")
-                    
-            except Exception as e:
-                logger.error(f"Error loading news data for {ticker}: {str(e)}")
-        
-        return loaded_count
+        if not news_data:
+            return 0
+
+        # Each distinct article is stored once and linked to every ticker it was found for
+        inserted = db_ops.bulk_insert_news(news_data)
+
+        if inserted is None:
+            logger.error("Failed to load news articles")
+            return 0
 
-    def load_stock_data(self, stock_data: Dict[str, Dict[str, Any]]) -> int:
+        logger.info(f"Loaded news for {len(news_data)} tickers ({inserted} new articles)")
+        return len(news_data)
+
+    def load_stock_data(self, stock_frame: pd.DataFrame) -> int:
         """Load stock data to database"""
         
+        if stock_frame.empty:
+            return 0
+
+        # Upsert every ticker's series in one statement
+        ticker_count = stock_frame["ticker"].nunique()
+        changed = db_ops.bulk_insert_stock_data(stock_frame)
+
+        if changed is not None:
+            logger.info(f"Loaded stock data for {ticker_count} tickers ({changed} rows changed)")
+            return ticker_count
+
+        logger.warning("Bulk stock load failed, falling back to per-ticker upserts")
+        return self._load_stock_data_rowwise(stock_frame)
+
+    def _load_stock_data_rowwise(self, stock_frame: pd.DataFrame) -> int:
+        """Upsert stock data one ticker at a time, skipping any that fail"""
+
         loaded_count = 0
         
-        for ticker, data in stock_data.items():
-            try:
-                success = db_ops.insert_stock_data(ticker, data)
+        try:
+            with db_ops.transaction():
+                for ticker, data in stock_frame_to_dict(stock_frame).items():
+                    try:
+                        success = db_ops.insert_stock_data(ticker, data)
                 
-                if success:
-                    loaded_count += 1
-                    logger.info(f"Loaded stock data for {ticker}")
-                else:
-                    logger.error(f"Failed to load stock data for {ticker}")
+                        if success:
+                            loaded_count += 1
+                            logger.info(f"Loaded stock data for {ticker}")
+                        else:
+                            logger.error(f"Failed to load stock data for {ticker}")
                     
-            except Exception as e:
-                logger.error(f"Error loading stock data for {ticker}: {str(e)}")
-        
+                    except Exception as e:
+                        logger.error(f"Error loading stock data for {ticker}: {str(e)}")
+
+        except Exception as e:
+            logger.error(f"Error committing stock data: {str(e)}")
+            return 0
+
         return loaded_count
 
     
@@ -222,7 +379,7 @@ class RedditDataPipeline:
         try:
             # Extract Reddit data
             logger.info("1: Extracting Reddit data...")
-            posts = self.extract_reddit_data()
+            posts, reddit_cursors = self.extract_reddit_data()
             
             if not posts:
                 logger.warning("No posts extracted. Pipeline stopping.")
@@ -234,6 +391,7 @@ class RedditDataPipeline:
             
             if not transformed_posts:
                 logger.warning("No posts with ticker mentions found. Pipeline stopping.")
+                self.load_reddit_data([], reddit_cursors)
                 return
 
             # Extract news data for all mentioned tickers
@@ -246,14 +404,10 @@ class RedditDataPipeline:
 
             # Load all data to database
             logger.info("5: Loading to database...")
-            reddit_loaded = self.load_reddit_data(transformed_posts)
+            reddit_loaded = self.load_reddit_data(transformed_posts, reddit_cursors)
             news_loaded = self.load_news_data(news_data)
             stock_loaded = self.load_stock_data(stock_data)
-            
-            # Refresh materialized view if Reddit data was loaded
-            if reddit_loaded > 0:
-                db_ops.refresh_materialized_view()
-                logger.info("Refreshed materialized view")
+            db_ops.bump_data_version()
 
             # Pipeline summary
             end_time = time.time()
@@ -0,0 +1,281 @@
+import logging
+import os
+import re
+import shutil
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from configs.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+store_backend = os.getenv("INTERMEDIATE_STORE_BACKEND", "parquet")
+store_dir = os.getenv("INTERMEDIATE_STORE_DIR", "/opt/airflow/data/intermediate")
+retention_days = float(os.getenv("INTERMEDIATE_STORE_RETENTION_DAYS", "7"))
+
+
+class IntermediateStore:
+    """
+    Storage for data handed between DAG tasks.
+
+    Tasks write their output as named tables (lists of flat records or Arrow
+    tables) and get back a small manifest dict, which is all that goes through XCom. Downstream
+    tasks pass the manifest to `read` / `read_records`.
+    """
+
+    def write(self, run_id: str, name: str, tables: Dict[str, List[Dict[str, Any]]], meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def read(self, manifest: Dict[str, Any], table: str) -> pa.Table:
+        raise NotImplementedError
+
+    def read_records(self, manifest: Dict[str, Any], table: str, offset: int = 0, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Read a table (or a slice of its rows) back as a list of dicts"""
+
+        return self.read(manifest, table).slice(offset, length).to_pylist()
+
+    def open_writer(self, run_id: str, name: str, table: str) -> "TableWriter":
+        """
+        Write one table incrementally: `append` chunks of records as they are
+        produced, then `close` to get the manifest (same as `write` returns).
+        """
+        return TableWriter(self, run_id, name, table)
+
+    def purge(self, max_age_days: float = retention_days):
+        """Remove outputs of old runs"""
+
+
+class TableWriter:
+    """Collects appended records and writes them in one go on close; stores that can append override open_writer"""
+
+    def __init__(self, store: IntermediateStore, run_id: str, name: str, table: str):
+        self.store = store
+        self.run_id = run_id
+        self.name = name
+        self.table = table
+        self.records = []
+
+    def append(self, records: List[Dict[str, Any]]):
+        self.records.extend(records)
+
+    def close(self, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return self.store.write(self.run_id, self.name, {self.table: self.records}, meta=meta)
+
+
+class ParquetTableWriter(TableWriter):
+    """
+    Appends each chunk to the Parquet file as its own row group, so only the
+    current chunk is held in memory. The schema is taken from the first chunk
+    (columns that are all null there become strings).
+    """
+
+    def __init__(self, store: "ParquetStore", run_id: str, name: str, table: str):
+        super().__init__(store, run_id, name, table)
+        self.directory = os.path.join(store._run_dir(run_id), name)
+        self.path = os.path.join(self.directory, f"{table}.parquet")
+        self.tmp_path = f"{self.path}.tmp"
+        self.writer = None
+        self.rows = 0
+
+    def append(self, records):
+        if not records:
+            return
+
+        if self.writer is None:
+            schema = pa.Table.from_pylist(records).schema
+            schema = pa.schema([
+                field.with_type(pa.string()) if pa.types.is_null(field.type) else field for field in schema
+            ])
+            os.makedirs(self.directory, exist_ok=True)
+            self.writer = pq.ParquetWriter(self.tmp_path, schema)
+
+        self.writer.write_table(pa.Table.from_pylist(records, schema=self.writer.schema))
+        self.rows += len(records)
+
+    def close(self, meta=None):
+        if self.writer is None:
+            return self.store.write(self.run_id, self.name, {self.table: []}, meta=meta)
+
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+        logger.info(f"Wrote {self.name} to {self.directory}: {self.table}={self.rows} rows")
+        return {
+            "backend": "parquet",
+            "name": self.name,
+            "path": self.directory,
+            "tables": {self.table: {"file": self.path, "rows": self.rows}},
+            "meta": meta or {},
+        }
+
+
+class InlineStore(IntermediateStore):
+    """Keeps records inside the manifest itself (the previous XCom behaviour); useful locally"""
+
+    def write(self, run_id, name, tables, meta=None):
+        tables = {table: rows.to_pylist() if isinstance(rows, pa.Table) else rows for table, rows in tables.items()}
+        return {
+            "backend": "inline",
+            "name": name,
+            "tables": {table: {"rows": len(rows), "records": rows} for table, rows in tables.items()},
+            "meta": meta or {},
+        }
+
+    def read(self, manifest, table):
+        return pa.Table.from_pylist(manifest["tables"][table]["records"])
+
+    def read_records(self, manifest, table, offset=0, length=None):
+        records = manifest["tables"][table]["records"]
+        return records[offset:] if length is None else records[offset:offset + length]
+
+
+class ParquetStore(IntermediateStore):
+    """Writes each table as a Parquet file under <base_dir>/<run_id>/<name>/ and reads them memory-mapped"""
+
+    def __init__(self, base_dir: str = store_dir):
+        self.base_dir = base_dir
+
+    def _run_dir(self, run_id: str) -> str:
+        return os.path.join(self.base_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", run_id))
+
+    def write(self, run_id, name, tables, meta=None):
+        directory = os.path.join(self._run_dir(run_id), name)
+        os.makedirs(directory, exist_ok=True)
+
+        manifest = {"backend": "parquet", "name": name, "path": directory, "tables": {}, "meta": meta or {}}
+
+        for table, rows in tables.items():
+            path = os.path.join(directory, f"{table}.parquet")
+            tmp_path = f"{path}.tmp"
+
+            arrow_table = rows if isinstance(rows, pa.Table) else pa.Table.from_pylist(rows)
+            pq.write_table(arrow_table, tmp_path)
+            os.replace(tmp_path, path)
+
+            manifest["tables"][table] = {"file": path, "rows": arrow_table.num_rows}
+
+        logger.info(f"Wrote {name} to {directory}: " + ", ".join(
+            f"{table}={info['rows']} rows" for table, info in manifest["tables"].items()
+        ))
+        return manifest
+
+    def read(self, manifest, table):
+        return pq.read_table(manifest["tables"][table]["file"], memory_map=True)
+
+    def open_writer(self, run_id, name, table):
+        return ParquetTableWriter(self, run_id, name, table)
+
+    def purge(self, max_age_days=retention_days):
+        if not os.path.isdir(self.base_dir):
+            return
+
+        cutoff = time.time() - max_age_days * 86400
+        for entry in os.scandir(self.base_dir):
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                logger.info(f"Purged intermediate data {entry.path}")
+
+
+def get_store(backend: str = store_backend) -> IntermediateStore:
+    """Return the configured intermediate store"""
+
+    if backend == "inline":
+        return InlineStore()
+    if backend == "parquet":
+        return ParquetStore()
+    raise ValueError(f"Unknown intermediate store backend: {backend}")
+
+
+# Conversions between the pipeline's nested structures and flat tables
+
+def pack_transformed(transformed_posts: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Split transformed posts into a posts table and a ticker mentions table"""
+
+    posts, mentions = [], []
+    for index, post in enumerate(transformed_posts):
+        posts.append({'post_index': index, **{k: v for k, v in post.items() if k != 'ticker_sentiments'}})
+        for ticker, sentiment in post.get('ticker_sentiments', {}).items():
+            mentions.append({
+                'post_index': index,
+                'ticker': ticker,
+                'label': sentiment['label'],
+                'score': float(sentiment['score']),
+                'context': sentiment.get('context', ''),
+            })
+
+    return {'posts': posts, 'mentions': mentions}
+
+
+def unpack_transformed(posts: List[Dict[str, Any]], mentions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Inverse of pack_transformed"""
+
+    sentiments = defaultdict(dict)
+    for mention in mentions:
+        sentiments[mention['post_index']][mention['ticker']] = {
+            'label': mention['label'],
+            'score': mention['score'],
+            'context': mention['context'],
+        }
+
+    transformed = []
+    for post in posts:
+        post = dict(post)
+        index = post.pop('post_index')
+        post['ticker_sentiments'] = sentiments.get(index, {})
+        transformed.append(post)
+
+    return transformed
+
+
+def pack_news(news_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Flatten {ticker: [articles]} into one articles table"""
+
+    return {'articles': [{**article, 'ticker': ticker} for ticker, articles in news_data.items() for article in articles]}
+
+
+def unpack_news(articles: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Inverse of pack_news"""
+
+    news_data = defaultdict(list)
+    for article in articles:
+        news_data[article['ticker']].append(article)
+    return dict(news_data)
+
+
+def pack_stock(stock_frame: pd.DataFrame) -> Dict[str, pa.Table]:
+    """Store the columnar stock frame (see extract.daily_stock_data.STOCK_COLUMNS) as one daily table"""
+
+    return {'daily': pa.Table.from_pandas(stock_frame, preserve_index=False)}
+
+
+def unpack_stock(tables: List[pa.Table]) -> pd.DataFrame:
+    """Inverse of pack_stock, concatenating the daily tables of several shards"""
+
+    if not tables:
+        return pd.DataFrame()
+
+    # Shards that fetched nothing have untyped (null) columns
+    return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+
+if __name__ == "__main__":
+    # Testing
+    store = ParquetStore(base_dir="data/intermediate_test")
+    transformed = [{
+        'reddit_id': 'abc123',
+        'title': 'Test post about $AAPL',
+        'body': 'I love Apple stock!',
+        'subreddit': 'investing',
+        'post_score': 100,
+        'comment_count': 25,
+        'ticker_sentiments': {'AAPL': {'label': 'positive', 'score': 0.85, 'context': 'I love Apple stock'}},
+    }]
+    manifest = store.write("manual_test", "transformed", pack_transformed(transformed), meta={"tickers": ["AAPL"]})
+    print(manifest)
+    print(unpack_transformed(store.read_records(manifest, "posts"), store.read_records(manifest, "mentions")))
@@ -1,9 +1,12 @@
 from airflow import DAG
 from airflow.decorators import task
 from datetime import datetime, timedelta
+from functools import lru_cache
+import os
 
-from dag_helper import RedditDataPipeline
-from load.db_operations import db_ops
+# The dag-processor re-parses this file constantly, so anything heavy (torch,
+# PRAW, psycopg2, pyarrow, ...) is imported inside the tasks instead of here.
+# Check with: python scripts/check_dag_import_time.py
 
 default_args = {
     'owner': 'airflow',
@@ -25,79 +28,160 @@ with DAG(
     tags=['reddit', 'stocks', 'news'],
 ) as dag:
 
-    pipeline = RedditDataPipeline()
+    @lru_cache(maxsize=None)
+    def pipeline():
+        from dag_helper import RedditDataPipeline
+        return RedditDataPipeline()
 
-    @task
-    def extract_reddit():
-        """Pull posts from all subreddits"""
-        return pipeline.extract_reddit_data()
+    # Task outputs are written to the intermediate store; only manifests go through XCom
+    @lru_cache(maxsize=None)
+    def store():
+        from intermediate_store import get_store
+        return get_store()
 
-    @task
-    def transform(posts):
-        """
-        Run sentiment/ticker extraction.
-        Returns a tuple: (transformed_posts, unique_tickers)
-        """
-        return pipeline.transform_sentiment(posts)
+    # Cap how many extraction shards run at once. API quotas are per key, so each
+    # shard's fetch engine limits itself to 1/N of the quota, where N is how many
+    # actually run together: min(number of chunks, cap)
+    news_parallelism = int(os.getenv("NEWS_EXTRACT_PARALLELISM", "4"))
+    stock_parallelism = int(os.getenv("STOCK_EXTRACT_PARALLELISM", "1"))
 
-    @task
-    def extract_news(unique_tickers):
-        """Fetch latest news for all tickers"""
-        return pipeline.extract_news_data(unique_tickers)    
+    # A mapped task expanded over an empty list (no posts, or no tickers) is skipped.
+    # Everything downstream of one uses none_failed, so it still runs with an empty
+    # list of manifests and the run saves its cursors and bumps the data version
+    NONE_FAILED = "none_failed"
 
-    @task
-    def extract_stock(unique_tickers):
-        """Fetch historical stock prices for tickers"""
-        return pipeline.extract_stock_data(unique_tickers)   
+    def _shard_name(name, ti):
+        """Unique store name per mapped task instance"""
+        return f"{name}_{ti.map_index}" if ti is not None and ti.map_index >= 0 else name
 
     @task
-    def load_reddit(transformed_posts):
+    def extract_reddit(run_id=None):
         """
-        Load posts + ticker mentions into the DB.
+        Pull posts from all subreddits, appending each chunk to the store as it arrives.
+        The new per-subreddit high-water marks go in the manifest meta and are saved by load_reddit.
         """
-        return pipeline.load_reddit_data(transformed_posts)
-
-    @task
-    def load_news(news_data):
-        """Load news articles into the DB"""
-        return pipeline.load_news_data(news_data)
+        store().purge()
+        writer = store().open_writer(run_id, "reddit_posts", "posts")
+        _, reddit_cursors = pipeline().extract_reddit_data(sink=writer.append)
+        return writer.close(meta={"reddit_cursors": reddit_cursors})
 
     @task
-    def load_stock(stock_data):
-        """Load stock data into the DB"""
-        return pipeline.load_stock_data(stock_data)
+    def shard_posts(posts_manifest):
+        """Split the extracted posts into batches for parallel transform"""
+        shards = pipeline().shard_posts(posts_manifest["tables"]["posts"]["rows"])
+        return [{"manifest": posts_manifest, **shard} for shard in shards]
 
     @task
-    def refresh_view(post_load_count):
+    def transform(shard, run_id=None, ti=None):
         """
-        Refresh the materialized view, but only if we loaded any Reddit posts.
+        Run sentiment/ticker extraction on one batch of posts.
+        Returns a manifest for the transformed posts, with the unique tickers in its meta.
+        Fails if any post could not be scored, so the batch is retried.
         """
-        if post_load_count and post_load_count > 0:
-            db_ops.refresh_materialized_view()
-        return
-
-    @task
-    def get_tickers(transformed_and_tickers):
-        """Extract tickers from the transform result"""
-        return transformed_and_tickers[1]
-
-    @task
-    def get_transformed_posts(transformed_and_tickers):
-        """Extract transformed posts from the transform result"""
-        return transformed_and_tickers[0]
+        from intermediate_store import pack_transformed
+
+        posts = store().read_records(shard["manifest"], "posts", shard["offset"], shard["length"])
+        transformed_posts, unique_tickers = pipeline().transform_sentiment(posts)
+        return store().write(
+            run_id, _shard_name("transformed", ti), pack_transformed(transformed_posts),
+            meta={"tickers": unique_tickers, "complete": True}
+        )
+
+    @task(trigger_rule=NONE_FAILED, multiple_outputs=True)
+    def shard_tickers(transformed_manifests):
+        """Union the tickers from all transform batches and split them into chunks"""
+        tickers = set()
+        for manifest in transformed_manifests:
+            tickers.update(manifest["meta"]["tickers"])
+        chunks = pipeline().shard_tickers(list(tickers))
+        return {"chunks": chunks, "chunk_count": len(chunks)}
+
+    @task(max_active_tis_per_dagrun=news_parallelism)
+    def extract_news(unique_tickers, chunk_count, run_id=None, ti=None):
+        """Fetch latest news for a chunk of tickers"""
+        from intermediate_store import pack_news
+
+        news_data = pipeline().extract_news_data(unique_tickers, shards=min(chunk_count, news_parallelism))
+        return store().write(run_id, _shard_name("news", ti), pack_news(news_data))
+
+    @task(max_active_tis_per_dagrun=stock_parallelism)
+    def extract_stock(unique_tickers, chunk_count, run_id=None, ti=None):
+        """Fetch historical stock prices for a chunk of tickers"""
+        from intermediate_store import pack_stock
+
+        stock_frame = pipeline().extract_stock_data(unique_tickers, shards=min(chunk_count, stock_parallelism))
+        return store().write(run_id, _shard_name("stock", ti), pack_stock(stock_frame))
+
+    @task(trigger_rule=NONE_FAILED)
+    def load_reddit(transformed_manifests, posts_manifest):
+        """
+        Load posts + ticker mentions from all transform batches into the DB,
+        advancing the subreddit high-water marks once they are stored.
+        """
+        from intermediate_store import unpack_transformed
+
+        transformed_posts = []
+        for manifest in transformed_manifests:
+            transformed_posts.extend(unpack_transformed(
+                store().read_records(manifest, "posts"),
+                store().read_records(manifest, "mentions"),
+            ))
+
+        # Only advance the cursors when every transform batch finished cleanly
+        expected = len(pipeline().shard_posts(posts_manifest["tables"]["posts"]["rows"]))
+        complete = len(transformed_manifests) == expected and all(
+            manifest["meta"].get("complete") for manifest in transformed_manifests
+        )
+        reddit_cursors = posts_manifest["meta"].get("reddit_cursors") if complete else None
+        return pipeline().load_reddit_data(transformed_posts, reddit_cursors)
+
+    @task(trigger_rule=NONE_FAILED)
+    def load_news(news_manifests):
+        """Load news articles from all extraction shards into the DB"""
+        from intermediate_store import unpack_news
+
+        news_data = {}
+        for manifest in news_manifests:
+            news_data.update(unpack_news(store().read_records(manifest, "articles")))
+        return pipeline().load_news_data(news_data)
+
+    @task(trigger_rule=NONE_FAILED)
+    def load_stock(stock_manifests):
+        """Load stock data from all extraction shards into the DB"""
+        from intermediate_store import unpack_stock
+
+        stock_frame = unpack_stock([store().read(manifest, "daily") for manifest in stock_manifests])
+        return pipeline().load_stock_data(stock_frame)
+
+    @task(trigger_rule=NONE_FAILED)
+    def apply_retention(post_load_count):
+        """Roll up and drop monthly partitions past the retention window"""
+        from load.db_operations import db_ops
+
+        return db_ops.drop_old_partitions()
+
+    @task(trigger_rule=NONE_FAILED)
+    def mark_loaded(reddit_count, news_count, stock_count, dropped_months):
+        """Bump the data version so dashboard caches pick up this run"""
+        from load.db_operations import db_ops
+
+        return db_ops.bump_data_version()
 
     
     posts = extract_reddit()
-    transformed_and_tickers = transform(posts)
-        
-    tickers = get_tickers(transformed_and_tickers)
+    transformed = transform.expand(shard=shard_posts(posts))
 
-    news_data  = extract_news(tickers)
-    stock_data = extract_stock(tickers)
+    ticker_chunks = shard_tickers(transformed)
 
-    transformed_posts = get_transformed_posts(transformed_and_tickers)
-    reddit_count = load_reddit(transformed_posts)
+    news_data  = extract_news.partial(chunk_count=ticker_chunks["chunk_count"]).expand(unique_tickers=ticker_chunks["chunks"])
+    stock_data = extract_stock.partial(chunk_count=ticker_chunks["chunk_count"]).expand(unique_tickers=ticker_chunks["chunks"])
+
+    reddit_count = load_reddit(transformed, posts)
     news_count   = load_news(news_data)
     stock_count  = load_stock(stock_data)
 
-    refresh_view(reddit_count)
\ No newline at end of file
+    # Ticker aggregates (ticker_mention_stats) are updated inside load_reddit's transaction,
+    # so there is no materialized view to refresh after the loads
+    dropped_months = apply_retention(reddit_count)
+
+    mark_loaded(reddit_count, news_count, stock_count, dropped_months)
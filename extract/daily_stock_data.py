@@ -1,11 +1,15 @@
-import requests
 import logging
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Union
+from datetime import datetime, timedelta, date
+import io
 import os
+import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
 
 from configs.logging_config import setup_logging
+from extract.fetch_engine import fetch_engine
+from extract.stock_series import StockSeries
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -13,18 +17,61 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 api_key = os.getenv("ALPHA_VANTAGE_API_KEY")
-base_url = "https://www.alphavantage.co/query"
+base_url = os.getenv("ALPHA_VANTAGE_BASE_URL", "https://www.alphavantage.co/query")
 
-def get_daily_stock_data(ticker: str, output_size: str = "compact") -> Optional[Dict[str, Any]]:
+# 'csv' responses are parsed straight into arrays; 'json' is the nested default format
+datatype = os.getenv("ALPHA_VANTAGE_DATATYPE", "csv")
+
+# A compact response covers the last 100 trading days (~140 calendar days)
+COMPACT_WINDOW_DAYS = 140
+
+# Columnar layout shared by the batch API, the intermediate store and the bulk load
+STOCK_COLUMNS = ["ticker", "date", "open", "high", "low", "close", "volume"]
+_VALUE_DTYPES = {"open": "float64", "high": "float64", "low": "float64", "close": "float64", "volume": "int64"}
+
+
+def last_completed_trading_day(today: Optional[date] = None) -> date:
+    """Most recent weekday before today (market holidays are not accounted for)"""
+
+    day = (today or date.today()) - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def plan_stock_fetch(latest_date: Optional[date], today: Optional[date] = None) -> Optional[str]:
+    """
+    Decide how much history to request for a ticker given its latest stored date.
+
+    Returns:
+        'full' for new tickers or gaps longer than the compact window,
+        'compact' otherwise, or None when the stored data is already current
+    """
+    if latest_date is None:
+        return "full"
+
+    if latest_date >= last_completed_trading_day(today):
+        return None
+
+    if ((today or date.today()) - latest_date).days > COMPACT_WINDOW_DAYS:
+        return "full"
+
+    return "compact"
+
+
+def get_daily_stock_data(ticker: str, output_size: str = "compact", since: Optional[date] = None, use_cache: bool = True) -> Optional[Dict[str, Any]]:
     """
     Get daily stock data for a ticker
     
     Args:
         ticker: Stock ticker (e.g., 'AAPL', 'IBM')
         output_size: 'compact' (last 100 days) or 'full' (last 20 years)
+        since: Only keep days on or after this date (None keeps everything)
+        use_cache: Set to False to bypass the HTTP response cache
         
     Returns:
-        Dictionary with stock data or None if error
+        Dictionary with stock data or None if error; 'daily_data' is a
+        StockSeries, which reads like a {date: {open, high, low, close, volume}} dict
     """
 
     try:
@@ -36,18 +83,13 @@ def get_daily_stock_data(ticker: str, output_size: str = "compact") -> Optional[
         }
 
         logger.info(f"Fetching daily stock data for {ticker}")
-        response = requests.get(base_url, params=params)
+        response = fetch_engine.get("alpha_vantage", base_url, params, use_cache=use_cache)
         response.raise_for_status()
 
         data = response.json()
 
         # Check for API errors
-        if 'Error Message' in data:
-            logger.error(f"Alpha Vantage API error for {ticker}: {data['Error Message']}")
-            return None
-        
-        if 'Note' in data:
-            logger.warning(f"Alpha Vantage API limit reached: {data['Note']}")
+        if _check_error(ticker, data):
             return None
 
         # Extract metadata and time series data
@@ -68,17 +110,11 @@ def get_daily_stock_data(ticker: str, output_size: str = "compact") -> Optional[
                 'output_size': meta_data.get('4. Output Size', ''),
                 'time_zone': meta_data.get('5. Time Zone', '')
             },
-            'daily_data': {}
+            'daily_data': StockSeries.from_frame(_frame_from_json(time_series))
         }
-    
-        for date, values in time_series.items():
-            processed_data['daily_data'][date] = {
-                'open': float(values.get('1. open', 0)),
-                'high': float(values.get('2. high', 0)),
-                'low': float(values.get('3. low', 0)),
-                'close': float(values.get('4. close', 0)),
-                'volume': int(values.get('5. volume', 0))
-            }
+
+        if since:
+            processed_data['daily_data'] = processed_data['daily_data'].since(since)
         
         logger.info(f"Successfully fetched {len(processed_data['daily_data'])} days of data for {ticker}")
         return processed_data
@@ -87,9 +123,164 @@ def get_daily_stock_data(ticker: str, output_size: str = "compact") -> Optional[
         logger.error(f"Error fetching stock data for {ticker}: {str(e)}")
         return None
 
+
+def empty_stock_frame() -> pd.DataFrame:
+    """Stock frame with no rows and the standard column types"""
+
+    frame = pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in _VALUE_DTYPES.items()})
+    frame.insert(0, "date", pd.Series(dtype="datetime64[ns]"))
+    frame.insert(0, "ticker", pd.Series(dtype="object"))
+    return frame
+
+
+def _check_error(ticker: str, data: Dict[str, Any]) -> bool:
+    """Log Alpha Vantage error / limit payloads; returns True if the payload is one"""
+
+    if 'Error Message' in data:
+        logger.error(f"Alpha Vantage API error for {ticker}: {data['Error Message']}")
+        return True
+
+    if 'Note' in data or 'Information' in data:
+        logger.warning(f"Alpha Vantage API limit reached: {data.get('Note') or data.get('Information')}")
+        return True
+
+    return False
+
+
+def _frame_from_csv(text: str) -> pd.DataFrame:
+    """Parse a datatype=csv TIME_SERIES_DAILY body (timestamp,open,high,low,close,volume)"""
+
+    frame = pd.read_csv(io.StringIO(text), dtype=_VALUE_DTYPES, parse_dates=["timestamp"])
+    return frame.rename(columns={"timestamp": "date"})
+
+
+def _frame_from_json(time_series: Dict[str, Dict[str, str]]) -> pd.DataFrame:
+    """Parse the nested 'Time Series (Daily)' object column by column"""
+
+    values = list(time_series.values())
+    return pd.DataFrame({
+        "date": pd.to_datetime(list(time_series.keys())),
+        "open": np.array([v.get('1. open', 0) for v in values], dtype=np.float64),
+        "high": np.array([v.get('2. high', 0) for v in values], dtype=np.float64),
+        "low": np.array([v.get('3. low', 0) for v in values], dtype=np.float64),
+        "close": np.array([v.get('4. close', 0) for v in values], dtype=np.float64),
+        "volume": np.array([v.get('5. volume', 0) for v in values], dtype=np.int64),
+    })
+
+
+def get_daily_stock_frame(ticker: str, output_size: str = "compact", since: Optional[date] = None, data_type: str = datatype, use_cache: bool = True) -> Optional[pd.DataFrame]:
+    """
+    Get daily stock data for a ticker as a columnar frame
+
+    Args:
+        ticker: Stock ticker (e.g., 'AAPL', 'IBM')
+        output_size: 'compact' (last 100 days) or 'full' (last 20 years)
+        since: Only keep days on or after this date (None keeps everything)
+        data_type: 'csv' or 'json' response format
+        use_cache: Set to False to bypass the HTTP response cache
+
+    Returns:
+        DataFrame with STOCK_COLUMNS, oldest day first, or None if error
+    """
+
+    try:
+        params = {
+            "function": "TIME_SERIES_DAILY",
+            "symbol": ticker,
+            "outputsize": output_size,
+            "datatype": data_type,
+            "apikey": api_key,
+        }
+
+        logger.info(f"Fetching daily stock data for {ticker} ({data_type})")
+        response = fetch_engine.get("alpha_vantage", base_url, params, use_cache=use_cache)
+        response.raise_for_status()
+
+        # Errors and limit notices come back as JSON even for datatype=csv
+        if data_type == "csv" and not response.text.lstrip().startswith("{"):
+            frame = _frame_from_csv(response.text)
+        else:
+            data = response.json()
+            if _check_error(ticker, data):
+                return None
+            frame = _frame_from_json(data.get('Time Series (Daily)', {}))
+
+        if frame.empty:
+            logger.warning(f"No time series data found for {ticker}")
+            return None
+
+        if since:
+            frame = frame[frame["date"] >= pd.Timestamp(since)]
+
+        frame.insert(0, "ticker", ticker)
+        frame = frame.sort_values("date", ignore_index=True)[STOCK_COLUMNS]
+
+        logger.info(f"Successfully fetched {len(frame)} days of data for {ticker}")
+        return frame
+
+    except Exception as e:
+        logger.error(f"Error fetching stock data for {ticker}: {str(e)}")
+        return None
+
+
+def get_daily_stock_batch(
+    tickers: List[str],
+    output_size: Union[str, Dict[str, str]] = "compact",
+    since: Optional[Dict[str, date]] = None,
+    data_type: str = datatype,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    Get daily stock data for many tickers as one columnar frame
+
+    Alpha Vantage has no multi-symbol daily endpoint, so this issues one
+    request per ticker through the fetch engine, which spreads them over the
+    provider's rate limit window and runs them concurrently.
+
+    Args:
+        tickers: Stock tickers
+        output_size: 'compact' / 'full' for all tickers, or a per-ticker dict
+        since: Per-ticker date to keep days from (missing tickers keep everything)
+        data_type: 'csv' or 'json' response format
+        use_cache: Set to False to bypass the HTTP response cache
+
+    Returns:
+        DataFrame with STOCK_COLUMNS sorted by ticker and date; tickers that
+        failed are left out
+    """
+    since = since or {}
+    sizes = output_size if isinstance(output_size, dict) else {ticker: output_size for ticker in tickers}
+
+    frames = fetch_engine.map(
+        lambda ticker: get_daily_stock_frame(ticker, sizes[ticker], since.get(ticker), data_type, use_cache),
+        tickers
+    )
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+
+    if not frames:
+        return empty_stock_frame()
+
+    batch = pd.concat(frames, ignore_index=True)
+    logger.info(f"Fetched {len(batch)} daily rows for {len(frames)} of {len(tickers)} tickers")
+    return batch
+
+
+def stock_frame_to_dict(stock_frame: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Split a stock frame into the per-ticker {'ticker', 'daily_data': StockSeries} form of get_daily_stock_data"""
+
+    return {
+        ticker: {'ticker': ticker, 'daily_data': StockSeries.from_frame(group)}
+        for ticker, group in stock_frame.groupby("ticker", sort=False)
+    }
+
+
 if __name__ == "__main__":
     # Testing
     ticker = "AAPL"
     output_size = "full"
     data = get_daily_stock_data(ticker, output_size)
     print(data)
+
+    batch = get_daily_stock_batch(["AAPL", "MSFT", "IBM"], output_size="compact")
+    print(batch.groupby("ticker").size())
+    print(batch.memory_usage(deep=True).sum(), "bytes")
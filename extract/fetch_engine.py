@@ -0,0 +1,272 @@
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import logging
+import os
+import threading
+import time
+
+from configs.logging_config import setup_logging
+from extract.http_cache import ResponseCache, response_cache
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at `rate_per_minute`; up to `burst` tokens can
+    accumulate while idle.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+def _alpha_vantage_throttled(response: requests.Response) -> bool:
+    """
+    Alpha Vantage answers throttled calls with HTTP 200 and a JSON body whose
+    first key is "Note" or "Information" (also for datatype=csv requests).
+    """
+    head = response.text[:200].lstrip()
+    return head.startswith("{") and ('"Note"' in head or '"Information"' in head)
+
+
+# Per-provider quotas. Defaults match the free tiers and can be raised via env.
+# The quota is per API key, but each extraction task process has its own
+# limiter; the DAG tells each process how many run at once (FetchEngine.set_shards).
+PROVIDERS = {
+    "alpha_vantage": {
+        "rate_per_minute": float(os.getenv("ALPHA_VANTAGE_RATE_PER_MINUTE", "5")),
+        "burst": int(os.getenv("ALPHA_VANTAGE_BURST", "1")),
+        "is_throttled": _alpha_vantage_throttled,
+        "cache_ttl": float(os.getenv("ALPHA_VANTAGE_CACHE_TTL", "43200")),
+    },
+    "newsapi": {
+        "rate_per_minute": float(os.getenv("NEWS_API_RATE_PER_MINUTE", "60")),
+        "burst": int(os.getenv("NEWS_API_BURST", "5")),
+        "is_throttled": None,
+        "cache_ttl": float(os.getenv("NEWS_API_CACHE_TTL", "3600")),
+    },
+}
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+max_workers = int(os.getenv("FETCH_MAX_WORKERS", "4"))
+max_retries = int(os.getenv("FETCH_MAX_RETRIES", "3"))
+backoff_seconds = float(os.getenv("FETCH_BACKOFF_SECONDS", "15"))
+
+
+class FetchEngine:
+    """
+    Shared HTTP client for the extract modules.
+
+    All requests go through one pooled requests.Session, are rate limited per
+    provider, and are retried with exponential backoff on connection errors,
+    HTTP 429/5xx and provider-specific throttle responses. Successful
+    responses are cached per provider TTL and revalidated with conditional
+    requests once stale. `map` runs a fetch function over many items with
+    bounded concurrency.
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, Dict[str, Any]] = PROVIDERS,
+        max_workers: int = max_workers,
+        max_retries: int = max_retries,
+        backoff: float = backoff_seconds,
+        timeout: float = 30,
+        cache: Optional[ResponseCache] = response_cache,
+    ):
+        self.providers = providers
+        self.cache = cache
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(providers), pool_maxsize=max(max_workers, 1))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.limiters = {}
+        for name in providers:
+            self.set_shards(name, 1)
+
+    def set_shards(self, provider: str, shards: int):
+        """
+        Limit this process to 1/`shards` of the provider's quota, for when
+        `shards` processes (e.g. mapped extraction tasks) share one API key.
+        Each share keeps a burst of at least one request.
+        """
+        config = self.providers[provider]
+        shards = max(1, shards)
+        self.limiters[provider] = TokenBucket(config["rate_per_minute"] / shards, max(1, config.get("burst", 1) // shards))
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Exponential backoff, honouring Retry-After when the server sends one"""
+
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+
+        return self.backoff * (2 ** attempt)
+
+    def get(self, provider: str, url: str, params: Optional[Dict[str, Any]] = None, use_cache: bool = True) -> requests.Response:
+        """
+        Rate-limited, cached GET with retries.
+
+        Args:
+            provider: Key into PROVIDERS (e.g. 'alpha_vantage', 'newsapi')
+            url: Request URL
+            params: Query parameters
+            use_cache: Set to False to bypass the response cache
+
+        Returns:
+            The final response. If every attempt was throttled, the last
+            throttled response is returned so the caller can report it.
+        """
+        config = self.providers[provider]
+        cache = self.cache if use_cache and config.get("cache_ttl") else None
+
+        key, entry, headers = None, None, {}
+        if cache is not None:
+            key = cache.make_key(url, params)
+            entry = cache.load(key)
+            if entry is not None:
+                if cache.is_fresh(entry, config["cache_ttl"]):
+                    logger.debug(f"{provider} cache hit for {url}")
+                    return cache.to_response(entry)
+                headers = cache.validators(entry)
+
+        response = self._get_with_retries(provider, url, params, headers)
+
+        if cache is not None:
+            if response.status_code == 304 and entry is not None:
+                return cache.to_response(cache.touch(key, entry))
+            if response.status_code == 200 and not self._is_throttled(provider, response):
+                cache.store(key, response)
+
+        return response
+
+    def _is_throttled(self, provider: str, response: requests.Response) -> bool:
+        is_throttled = self.providers[provider].get("is_throttled")
+        return response.status_code in _RETRY_STATUS or (
+            response.ok and is_throttled is not None and is_throttled(response)
+        )
+
+    def _get_with_retries(self, provider: str, url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> requests.Response:
+        """Issue the request under the provider's rate limit, retrying on throttling"""
+
+        limiter = self.limiters[provider]
+
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire()
+
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"{provider} request failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if not self._is_throttled(provider, response) or attempt == self.max_retries:
+                return response
+
+            delay = self._retry_delay(attempt, response)
+            logger.warning(f"{provider} throttled (HTTP {response.status_code}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+        return response
+
+    def map(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """
+        Apply `fn` to every item concurrently, preserving input order.
+
+        Items whose call raises are logged and returned as None.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        def _call(item):
+            try:
+                return fn(item)
+            except Exception as e:
+                logger.error(f"Fetch failed for {item}: {str(e)}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(_call, items))
+
+
+fetch_engine = FetchEngine()
+
+
+if __name__ == "__main__":
+    # Testing against a local stub server: the first call is throttled
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import json
+
+    calls = []
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            calls.append(self.path)
+            if len(calls) == 1:
+                body = {"Note": "Thank you for using Alpha Vantage! Our standard API rate limit is ..."}
+            else:
+                body = {"Meta Data": {"2. Symbol": "IBM"}, "Time Series (Daily)": {}}
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{server.server_address[1]}/query"
+
+    engine = FetchEngine(
+        providers={"alpha_vantage": {**PROVIDERS["alpha_vantage"], "rate_per_minute": 600, "burst": 2}},
+        max_workers=2,
+        backoff=0.1,
+        cache=None,
+    )
+    results = engine.map(lambda t: engine.get("alpha_vantage", stub_url, {"symbol": t}).json(), ["IBM", "AAPL"])
+    print(results)
+    print(f"{len(calls)} requests served")
+    server.shutdown()
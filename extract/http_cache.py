@@ -0,0 +1,126 @@
+import requests
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from configs.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+cache_dir = os.getenv("HTTP_CACHE_DIR", "cache/http")
+cache_enabled = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+
+# Query parameters that never take part in the cache key
+_SECRET_PARAMS = {"apikey", "api_key", "token"}
+
+
+class ResponseCache:
+    """
+    Filesystem cache for successful API responses.
+
+    Entries are keyed by the URL and the normalized query parameters with API
+    keys stripped, and stored as one JSON file each. Expired entries are kept
+    so their ETag / Last-Modified validators can be used to revalidate.
+    """
+
+    def __init__(self, directory: str = cache_dir):
+        self.directory = directory
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Hash of the URL and sorted params, without credentials"""
+
+        items = sorted(
+            (str(k), str(v))
+            for k, v in (params or {}).items()
+            if str(k).lower() not in _SECRET_PARAMS and v is not None
+        )
+        return hashlib.sha256(f"{url}?{urlencode(items)}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a key, fresh or not"""
+
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {str(e)}")
+            return None
+
+    def store(self, key: str, response: requests.Response) -> Dict[str, Any]:
+        """Write a response to the cache and return the stored entry"""
+
+        entry = {
+            # Drop the query string so API keys never reach the disk
+            "url": response.url.split("?", 1)[0],
+            "status_code": response.status_code,
+            "headers": {
+                name: response.headers[name]
+                for name in ("Content-Type", "ETag", "Last-Modified")
+                if name in response.headers
+            },
+            "body": response.text,
+            "fetched_at": time.time(),
+        }
+        self._write(key, entry)
+        return entry
+
+    def touch(self, key: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark an entry as freshly validated (after a 304)"""
+
+        entry["fetched_at"] = time.time()
+        self._write(key, entry)
+        return entry
+
+    def _write(self, key: str, entry: Dict[str, Any]):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write cache entry {key}: {str(e)}")
+
+    @staticmethod
+    def is_fresh(entry: Dict[str, Any], ttl: float) -> bool:
+        return time.time() - entry["fetched_at"] < ttl
+
+    @staticmethod
+    def validators(entry: Dict[str, Any]) -> Dict[str, str]:
+        """Conditional request headers for revalidating an entry"""
+
+        headers = {}
+        if "ETag" in entry["headers"]:
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if "Last-Modified" in entry["headers"]:
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    @staticmethod
+    def to_response(entry: Dict[str, Any]) -> requests.Response:
+        """Rebuild a requests.Response from a cache entry"""
+
+        response = requests.Response()
+        response.status_code = entry["status_code"]
+        response.url = entry["url"]
+        response.headers.update(entry["headers"])
+        response.headers["X-Cache"] = "HIT"
+        response.encoding = "utf-8"
+        response._content = entry["body"].encode("utf-8")
+        return response
+
+
+response_cache = ResponseCache() if cache_enabled else None
@@ -1,11 +1,11 @@
-import requests
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from configs.logging_config import setup_logging
+from extract.fetch_engine import fetch_engine
 
 load_dotenv()
 
@@ -13,24 +13,30 @@ setup_logging()
 logger = logging.getLogger(__name__)
 
 api_key = os.getenv("NEWS_API_KEY")
-base_url = "https://newsapi.org/v2"
+base_url = os.getenv("NEWS_API_BASE_URL", "https://newsapi.org/v2")
 
-if not api_key:
-    raise ValueError("NEWS_API_KEY not found in environment variables")
-    logger.error("NEWS_API_KEY not found in environment variables")
+# How far back the NewsAPI plan can search (one month on the free plan); older 'from' dates are rejected
+max_lookback_days = int(os.getenv("NEWS_MAX_LOOKBACK_DAYS", "30"))
 
-def get_news_for_ticker(ticker: str, page: int = 1, page_size: int = 5, language: str = "en") -> List[Dict[str, Any]]:
+
+def get_news_for_ticker(ticker: str, page: int = 1, page_size: int = 5, language: str = "en", since: Optional[datetime] = None, use_cache: bool = True) -> List[Dict[str, Any]]:
     """
     Get news articles for a specific ticker
     
     Args:
         ticker: Stock ticker symbol (e.g., 'AAPL', 'GOOGL')
         page_size: Number of articles to return (max 100)
-        days_back: Number of days to look back for news
+        since: Only return articles published at or after this time (NewsAPI 'from');
+            ignored when it is older than the plan's search window
+        use_cache: Set to False to bypass the HTTP response cache
         
     Returns:
         List of news articles
     """
+    # Checked here rather than at import so modules that only import this one (e.g. DAG parsing) don't need the key
+    if not api_key:
+        raise ValueError("NEWS_API_KEY not found in environment variables")
+
     try:
         query = f"{ticker} stock"
 
@@ -42,9 +48,12 @@ def get_news_for_ticker(ticker: str, page: int = 1, page_size: int = 5, language
             "pageSize": page_size,
             "language": language,
         }
+        # A 'from' outside the plan's window fails every run, so fall back to the whole window
+        if since and since > datetime.now(since.tzinfo) - timedelta(days=max_lookback_days):
+            params["from"] = since.isoformat(timespec="seconds")
 
         logger.info(f"Fetching news for {ticker}")
-        response = requests.get(url, params=params)
+        response = fetch_engine.get("newsapi", url, params, use_cache=use_cache)
         response.raise_for_status()
 
         data = response.json()
@@ -1,7 +1,10 @@
 import logging
+import queue
+import threading
 import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from configs.praw_config import reddit
+from configs.praw_config import get_reddit, create_reddit
 from configs.logging_config import setup_logging
 
 setup_logging()
@@ -21,21 +24,169 @@ def get_subreddit_data(subreddit_name: str, limit: int = 100):
     Returns
     -------
     praw.models.ListingGenerator
-        A generator of PRAW Submission objects representing the top posts.   
+        A generator of PRAW Submission objects representing the top posts.
     """
-    
+
     logger.info(f"Getting posts from {subreddit_name} with limit {limit}")
-    subreddit = reddit.subreddit(subreddit_name)
+    subreddit = get_reddit().subreddit(subreddit_name)
     return subreddit.top(limit=limit)
 
+
+def post_to_dict(post) -> Dict[str, Any]:
+    """Convert a PRAW Submission into a serializable dictionary"""
+
+    return {
+        'id': post.id,
+        'fullname': post.name,
+        'title': post.title,
+        'selftext': getattr(post, 'selftext', ''),
+        'subreddit': str(post.subreddit),
+        'score': getattr(post, 'score', 0),
+        'num_comments': getattr(post, 'num_comments', 0),
+        'created_utc': post.created_utc,
+        'url': post.url,
+        'author': str(post.author) if post.author else '[deleted]'
+    }
+
+
+def stream_new_posts(
+    subreddit_name: str,
+    after_utc: Optional[float] = None,
+    chunk_size: int = 100,
+    limit: int = 1000,
+    client=None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Stream posts newer than a high-water mark from a subreddit's `new` listing.
+
+    Parameters
+    ----------
+    subreddit_name : str
+        Name of the subreddit (e.g., "python", "investing").
+    after_utc : float, optional
+        Only posts created strictly after this timestamp are returned. None
+        returns the whole listing up to `limit`.
+    chunk_size : int, optional
+        Number of posts per yielded chunk (default is 100).
+    limit : int, optional
+        Maximum number of posts to scan (Reddit listings stop around 1000).
+    client : praw.Reddit, optional
+        PRAW client to use; defaults to the shared instance.
+
+    Yields
+    ------
+    List[Dict[str, Any]]
+        Chunks of post dictionaries, newest first.
+    """
+
+    logger.info(f"Streaming new posts from {subreddit_name} after {after_utc}")
+    subreddit = (client or get_reddit()).subreddit(subreddit_name)
+
+    chunk = []
+    for post in subreddit.new(limit=limit):
+        # The listing is ordered newest first, so stop at the high-water mark
+        if after_utc is not None and post.created_utc <= after_utc:
+            break
+
+        chunk.append(post_to_dict(post))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def stream_subreddits(
+    cursors: Dict[str, Optional[float]],
+    chunk_size: int = 100,
+    limit: int = 1000,
+    max_workers: int = 3,
+) -> Iterator[Tuple[str, Optional[List[Dict[str, Any]]]]]:
+    """
+    Stream new posts from several subreddits concurrently.
+
+    Parameters
+    ----------
+    cursors : Dict[str, Optional[float]]
+        Subreddit name -> created_utc high-water mark (see stream_new_posts).
+    chunk_size, limit : int
+        Passed through to stream_new_posts.
+    max_workers : int, optional
+        Number of subreddits fetched at the same time.
+
+    Yields
+    ------
+    Tuple[str, Optional[List[Dict[str, Any]]]]
+        (subreddit, chunk) as chunks arrive. A chunk of None means extraction
+        for that subreddit failed and its cursor should not be advanced.
+    """
+
+    # Bounded queue so slow consumers apply backpressure to the fetch threads
+    results = queue.Queue(maxsize=max(1, max_workers) * 2)
+    pending = queue.Queue()
+    for item in cursors.items():
+        pending.put(item)
+
+    done = object()
+
+    def worker():
+        try:
+            client = create_reddit()
+        except Exception as e:
+            logger.error(f"Error creating Reddit client: {str(e)}")
+            client = None
+
+        while True:
+            try:
+                name, after_utc = pending.get_nowait()
+            except queue.Empty:
+                return
+
+            # Without a client, fail every subreddit this worker takes so the consumer never waits on it
+            if client is None:
+                results.put((name, None))
+                continue
+
+            try:
+                for chunk in stream_new_posts(name, after_utc, chunk_size, limit, client):
+                    results.put((name, chunk))
+                results.put((name, done))
+            except Exception as e:
+                logger.error(f"Error streaming posts from r/{name}: {str(e)}")
+                results.put((name, None))
+
+    for _ in range(min(max_workers, len(cursors))):
+        threading.Thread(target=worker, daemon=True).start()
+
+    remaining = len(cursors)
+    while remaining:
+        name, chunk = results.get()
+        if chunk is done:
+            remaining -= 1
+            continue
+        if chunk is None:
+            remaining -= 1
+        yield name, chunk
+
+
 if __name__ == "__main__":
     # Testing
     subreddit_name = "python"
     limit = 10
-    start = time.time() 
+    start = time.time()
     subreddit_data = get_subreddit_data(subreddit_name, limit)
     for post in subreddit_data:
         print(f"{post.title} (Score: {post.score})")
 
     end = time.time()
     logger.info(f"Time taken: {end - start} seconds")
+
+    # Stream everything posted in the last hour
+    start = time.time()
+    cursors = {name: time.time() - 3600 for name in ["python", "investing"]}
+    for name, chunk in stream_subreddits(cursors, chunk_size=25):
+        print(f"r/{name}: {len(chunk) if chunk else 'failed'}")
+
+    end = time.time()
+    logger.info(f"Time taken: {end - start} seconds")
@@ -0,0 +1,179 @@
+import sys
+import time
+import tracemalloc
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+# One row per trading day: 48 bytes, versus several hundred for a dict of boxed floats
+STOCK_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("open", "float64"),
+    ("high", "float64"),
+    ("low", "float64"),
+    ("close", "float64"),
+    ("volume", "int64"),
+])
+
+VALUE_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class StockSeries(Mapping):
+    """
+    Daily OHLCV series of one ticker, stored as a NumPy structured array sorted by date.
+
+    Behaves like the {date_str: {'open', 'high', 'low', 'close', 'volume'}}
+    dict that get_daily_stock_data used to return: `len`, `in`, `[day]`,
+    `keys()` and `items()` all work, with the per-day dicts built only when
+    they are asked for. Columnar consumers use `data`, `rows()` or `to_frame()`.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: np.ndarray):
+        data = np.asarray(data, dtype=STOCK_DTYPE)
+        if len(data) > 1 and not (np.diff(data["date"]) > np.timedelta64(0, "D")).all():
+            data = _dedupe(data)
+        self.data = data
+
+    @classmethod
+    def empty(cls) -> "StockSeries":
+        return cls(np.empty(0, dtype=STOCK_DTYPE))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "StockSeries":
+        """Build from a frame with date / open / high / low / close / volume columns"""
+
+        data = np.empty(len(frame), dtype=STOCK_DTYPE)
+        data["date"] = pd.to_datetime(frame["date"]).to_numpy(dtype="datetime64[D]")
+        for field in VALUE_FIELDS:
+            data[field] = frame[field].to_numpy()
+        return cls(data)
+
+    @classmethod
+    def from_dict(cls, daily_data: Dict[str, Dict[str, Any]]) -> "StockSeries":
+        """Build from the old {date_str: {field: value}} form"""
+
+        data = np.empty(len(daily_data), dtype=STOCK_DTYPE)
+        data["date"] = np.array(list(daily_data.keys()), dtype="datetime64[D]")
+        values = list(daily_data.values())
+        for field in VALUE_FIELDS:
+            data[field] = [day[field] for day in values]
+        return cls(data)
+
+    def to_frame(self, ticker: str) -> pd.DataFrame:
+        """Columnar frame in the layout of extract.daily_stock_data.STOCK_COLUMNS"""
+
+        frame = pd.DataFrame({"date": self.data["date"].astype("datetime64[ns]")})
+        for field in VALUE_FIELDS:
+            frame[field] = self.data[field]
+        frame.insert(0, "ticker", ticker)
+        return frame
+
+    def rows(self) -> Iterator[Tuple]:
+        """(date, open, high, low, close, volume) tuples of Python values, e.g. for executemany"""
+
+        return iter(self.data.tolist())
+
+    def since(self, day) -> "StockSeries":
+        """Days on or after `day`"""
+
+        start = np.searchsorted(self.data["date"], np.datetime64(day, "D"), side="left")
+        return StockSeries(self.data[start:])
+
+    def _index(self, day: str) -> int:
+        try:
+            key = np.datetime64(day, "D")
+        except (TypeError, ValueError):
+            raise KeyError(day)
+
+        index = int(np.searchsorted(self.data["date"], key))
+        if index >= len(self.data) or self.data["date"][index] != key:
+            raise KeyError(day)
+        return index
+
+    def __getitem__(self, day: str) -> Dict[str, Any]:
+        row = self.data[self._index(day)]
+        return {field: row[field].item() for field in VALUE_FIELDS}
+
+    def __contains__(self, day) -> bool:
+        try:
+            self._index(day)
+            return True
+        except KeyError:
+            return False
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(np.datetime_as_string(self.data["date"], unit="D").tolist())
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def items(self):
+        for day, *values in self.rows():
+            yield day.isoformat(), dict(zip(VALUE_FIELDS, values))
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return "StockSeries(0 days)"
+        return f"StockSeries({len(self)} days, {self.data['date'][0]} .. {self.data['date'][-1]})"
+
+    def __reduce__(self):
+        return StockSeries, (self.data,)
+
+
+def _dedupe(data: np.ndarray) -> np.ndarray:
+    """Sort by date, keeping the last occurrence of any repeated day"""
+
+    reversed_data = data[::-1]
+    _, first = np.unique(reversed_data["date"], return_index=True)
+    return reversed_data[first]
+
+
+def _benchmark(ticker_count: int, day_count: int = 5000):
+    """Peak memory of holding `ticker_count` full-history series as dicts vs StockSeries"""
+
+    rng = np.random.default_rng(0)
+    dates = np.datetime_as_string(np.datetime64("2005-01-03") + np.arange(day_count), unit="D").tolist()
+
+    def values():
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, day_count)))
+        return close, rng.integers(1_000, 10_000_000, day_count)
+
+    def as_dicts():
+        held = {}
+        for i in range(ticker_count):
+            close, volume = values()
+            held[f"T{i:04d}"] = {
+                day: {'open': float(c), 'high': float(c), 'low': float(c), 'close': float(c), 'volume': int(v)}
+                for day, c, v in zip(dates, close, volume)
+            }
+        return held
+
+    def as_series():
+        held = {}
+        for i in range(ticker_count):
+            close, volume = values()
+            data = np.empty(day_count, dtype=STOCK_DTYPE)
+            data["date"] = np.array(dates, dtype="datetime64[D]")
+            data["open"] = data["high"] = data["low"] = data["close"] = close
+            data["volume"] = volume
+            held[f"T{i:04d}"] = StockSeries(data)
+        return held
+
+    for name, build in (("dict of dicts", as_dicts), ("StockSeries", as_series)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        held = build()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>14}: {peak / 2**20:9.1f} MiB peak for {ticker_count} x {day_count} days "
+              f"({time.perf_counter() - start:.2f}s)")
+        del held
+
+
+if __name__ == "__main__":
+    # Benchmark: python -m extract.stock_series [ticker_count]
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -1,6 +1,12 @@
 import pandas as pd
 import re
-from typing import List, Set
+import os
+import pickle
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Set, FrozenSet, Optional
 import logging
 
 from configs.logging_config import setup_logging
@@ -8,21 +14,103 @@ from configs.logging_config import setup_logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+_SYMBOLS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "us_symbols.csv")
+_SNAPSHOT_PATH = os.getenv("TICKER_INDEX_SNAPSHOT", _SYMBOLS_CSV + ".idx.pkl")
+_SNAPSHOT_FORMAT = 1
 
-def _load_ticker_symbols() -> Set[str]:
-    """Load ticker symbols from a CSV file"""
-    
-    df = pd.read_csv("extract/us_symbols.csv")
-    return set(df["ticker"].str.upper())
+# Single pass over the text: "$TICKER" in the first group, bare "TICKER" in the second
+_TICKER_PATTERN = re.compile(r'\$([A-Z]{1,5})|\b([A-Z]{1,5})\b')
+
+# Same, with sentence endings in the first group so one scan splits sentences and finds tickers
+_SENTENCE_TICKER_PATTERN = re.compile(r'([.!?]+)|\$([A-Z]{1,5})|\b([A-Z]{1,5})\b')
+
+_ticker_index: Optional[FrozenSet[str]] = None
+_ticker_index_lock = threading.Lock()
+
+
+def _csv_version(path: str) -> str:
+    """Content hash of the symbols CSV, used to validate the snapshot"""
+
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _read_symbols_csv(path: str) -> FrozenSet[str]:
+    """Parse the symbols CSV into a frozenset of upper-cased tickers"""
+
+    df = pd.read_csv(path, usecols=["ticker"], dtype=str)
+    return frozenset(df["ticker"].dropna().str.strip().str.upper())
+
+
+def _read_snapshot(path: str, version: str) -> Optional[FrozenSet[str]]:
+    """Return the pickled index if it exists and matches the CSV version"""
+
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable ticker index snapshot {path}: {str(e)}")
+        return None
+
+    if snapshot.get("format") != _SNAPSHOT_FORMAT or snapshot.get("version") != version:
+        logger.info("Ticker index snapshot is stale, rebuilding")
+        return None
+
+    return frozenset(snapshot["tickers"])
+
+
+def _write_snapshot(path: str, version: str, tickers: FrozenSet[str]):
+    """Persist the index as a sorted tuple alongside the CSV version hash"""
+
+    try:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                {"format": _SNAPSHOT_FORMAT, "version": version, "tickers": tuple(sorted(tickers))},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Could not write ticker index snapshot {path}: {str(e)}")
+
+
+def _load_ticker_symbols() -> FrozenSet[str]:
+    """
+    Load ticker symbols once per process.
+
+    The parsed index is kept in memory and also written to a binary snapshot
+    keyed by the CSV hash, so new worker processes skip the pandas parse.
+    """
+    global _ticker_index
+
+    if _ticker_index is not None:
+        return _ticker_index
+
+    with _ticker_index_lock:
+        if _ticker_index is None:
+            version = _csv_version(_SYMBOLS_CSV)
+            tickers = _read_snapshot(_SNAPSHOT_PATH, version)
+
+            if tickers is None:
+                tickers = _read_symbols_csv(_SYMBOLS_CSV)
+                _write_snapshot(_SNAPSHOT_PATH, version, tickers)
+
+            logger.info(f"Loaded ticker index with {len(tickers)} symbols")
+            _ticker_index = tickers
+
+    return _ticker_index
 
 
 def extract_ticker_symbols(text: str) -> Set[str]:
     """
     Extract valid stock ticker symbols from a block of text.
 
-    This function uses regular expressions to identify both dollar-prefixed
-    (e.g., "$AAPL") and standalone (e.g., "AAPL") ticker mentions, and then
-    filters them using a validated list of known symbols.
+    This function uses a single regular expression pass to identify both
+    dollar-prefixed (e.g., "$AAPL") and standalone (e.g., "AAPL") ticker
+    mentions, and then filters them using a validated list of known symbols.
 
     Parameters
     ----------
@@ -35,29 +123,130 @@ def extract_ticker_symbols(text: str) -> Set[str]:
         A set of matched and validated ticker symbols found in the text.
     """
 
-    # Load all available ticker symbols
     tickers = _load_ticker_symbols()
 
-    # Patterns to match ticker symbols
-    patterns = [
-        r'\$([A-Z]{1,5})',  # $TICKER format
-        r'\b([A-Z]{1,5})\b'  # standalone TICKER format
-    ]
+    candidates = {dollar or bare for dollar, bare in _TICKER_PATTERN.findall(text)}
+    found_tickers = candidates & tickers
+
+    logger.debug(f"Found {len(found_tickers)} ticker symbols in text")
+
+    return set(found_tickers)
+
+
+def extract_ticker_sentences(text: str) -> Dict[str, List[str]]:
+    """
+    Map each ticker in a block of text to the sentences that mention it.
+
+    Sentences are split on runs of ".", "!" and "?" in the same regular
+    expression pass that finds ticker tokens, so each ticker is attributed
+    only to sentences where it appears as a whole token (no "A" inside
+    "Apple") and the cost is linear in the text length.
+
+    Parameters
+    ----------
+    text : str
+        The input text, e.g. a post title and body.
+
+    Returns
+    -------
+    Dict[str, List[str]]
+        Validated ticker -> stripped sentences mentioning it, in text order.
+    """
+
+    tickers = _load_ticker_symbols()
+
+    ticker_sentences = defaultdict(list)
+    sentence_start = 0
+    sentence_tickers = []
+
+    def close_sentence(end: int):
+        if sentence_tickers:
+            sentence = text[sentence_start:end].strip()
+            for ticker in sentence_tickers:
+                ticker_sentences[ticker].append(sentence)
+            sentence_tickers.clear()
+
+    for match in _SENTENCE_TICKER_PATTERN.finditer(text):
+        boundary, dollar, bare = match.groups()
+
+        if boundary:
+            close_sentence(match.start())
+            sentence_start = match.end()
+            continue
+
+        ticker = dollar or bare
+        if ticker in tickers and ticker not in sentence_tickers:
+            sentence_tickers.append(ticker)
+
+    close_sentence(len(text))
+
+    return dict(ticker_sentences)
 
-    found_tickers = set()
 
-    for pattern in patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
+def _legacy_extract_ticker_symbols(text: str) -> Set[str]:
+    """Previous implementation (CSV parse + two regex passes), kept for benchmarking"""
+
+    df = pd.read_csv(_SYMBOLS_CSV)
+    tickers = set(df["ticker"].str.upper())
+
+    found_tickers = set()
+    for pattern in [r'\$([A-Z]{1,5})', r'\b([A-Z]{1,5})\b']:
+        for match in re.findall(pattern, text):
             if match in tickers:
                 found_tickers.add(match)
 
-    logger.info(f"Found {len(found_tickers)} ticker symbols in text")
-
     return found_tickers
 
+
+def _benchmark(texts: List[str], legacy_runs: int = 50):
+    """
+    Micro-benchmark comparing the legacy and indexed extraction paths.
+    """
+
+    start = time.perf_counter()
+    for text in texts[:legacy_runs]:
+        legacy = _legacy_extract_ticker_symbols(text)
+    legacy_per_call = (time.perf_counter() - start) / min(legacy_runs, len(texts))
+
+    _load_ticker_symbols()
+    start = time.perf_counter()
+    for text in texts:
+        current = extract_ticker_symbols(text)
+    current_per_call = (time.perf_counter() - start) / len(texts)
+
+    assert legacy == current, f"Mismatch: {legacy} != {current}"
+
+    print(f"Legacy:  {legacy_per_call * 1e6:10.1f} us/post")
+    print(f"Indexed: {current_per_call * 1e6:10.1f} us/post")
+    print(f"Speedup: {legacy_per_call / current_per_call:10.1f}x")
+
+    # Ticker -> sentence mapping: substring check per sentence x ticker vs one scan
+    start = time.perf_counter()
+    for text in texts:
+        found = extract_ticker_symbols(text)
+        sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
+        [(t, s) for s in sentences for t in found if t in s or f"${t}" in s]
+    nested_per_call = (time.perf_counter() - start) / len(texts)
+
+    start = time.perf_counter()
+    for text in texts:
+        extract_ticker_sentences(text)
+    single_per_call = (time.perf_counter() - start) / len(texts)
+
+    print(f"Sentence mapping, nested loop: {nested_per_call * 1e6:10.1f} us/post")
+    print(f"Sentence mapping, one pass:    {single_per_call * 1e6:10.1f} us/post")
+
+
 if __name__ == "__main__":
     # Testing
     text = "I'm bullish on $AAPL and $GOOG. I also like $MSFT and $AMZN."
     tickers = extract_ticker_symbols(text)
-    print(tickers)
\ No newline at end of file
+    print(tickers)
+
+    sample_post = (
+        "DD: Why I'm loading up on $NVDA and AMD before earnings. "
+        "TSLA is overvalued IMO, and I sold my $GME calls. "
+        "Not financial advice, but AAPL and MSFT look cheap at these levels! "
+    ) * 5
+    print(extract_ticker_sentences(sample_post[:200]))
+    _benchmark([sample_post] * 10000)
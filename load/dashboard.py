@@ -0,0 +1,242 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from cachetools import TTLCache
+from psycopg2.extras import RealDictCursor
+
+from configs.db_connection import db
+from configs.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+cache_ttl = float(os.getenv("DASHBOARD_CACHE_TTL", "300"))
+cache_size = int(os.getenv("DASHBOARD_CACHE_SIZE", "256"))
+version_check_interval = float(os.getenv("DASHBOARD_VERSION_CHECK_SECONDS", "2"))
+fetch_size = int(os.getenv("DASHBOARD_FETCH_SIZE", "2000"))
+
+
+class DashboardData:
+    """
+    Read-side queries for the dashboard, with result caching.
+
+    Results are kept in a TTL cache keyed by the query parameters and the
+    pipeline's data version (the data_version table, bumped by the DAG after
+    each run). The version is re-read at most every `version_check_interval`
+    seconds, so repeat views are served from memory and a finished run
+    invalidates every cached result without any cross-process signalling.
+    """
+
+    def __init__(self, database=db, ttl: float = cache_ttl, maxsize: int = cache_size, check_interval: float = version_check_interval):
+        self.db = database
+        self.check_interval = check_interval
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+
+    def data_version(self) -> int:
+        """Current data version, re-read from the database at most every check_interval seconds"""
+
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at >= self.check_interval:
+            try:
+                with self.db.transaction() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT version FROM data_version WHERE id = 1")
+                    row = cursor.fetchone()
+                    cursor.close()
+                self._version = row[0] if row else 0
+            except Exception as e:
+                logger.warning(f"Could not read data version: {str(e)}")
+                self._version = self._version or 0
+            self._version_checked_at = now
+
+        return self._version
+
+    def invalidate(self):
+        """Drop every cached result in this process"""
+
+        with self._lock:
+            self._cache.clear()
+        self._version = None
+
+    def _cached(self, key: Tuple, load: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Serve a query result from the cache; callers get their own copies of the rows"""
+
+        key = (self.data_version(),) + key
+
+        with self._lock:
+            if key in self._cache:
+                return [dict(row) for row in self._cache[key]]
+
+        result = load()
+        with self._lock:
+            self._cache[key] = result
+        return [dict(row) for row in result]
+
+    def _query(self, query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self.db.transaction() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+            cursor.close()
+
+        return [dict(row) for row in results]
+
+    def iter_rows(self, query: str, params: Dict[str, Any], name: str = "dashboard_rows") -> Iterator[Dict[str, Any]]:
+        """
+        Stream a large result set through a named (server-side) cursor.
+
+        Rows are fetched `fetch_size` at a time, so memory use stays flat no
+        matter how many rows the query returns. Not cached.
+
+        The rows are read on a dedicated pooled connection rather than the
+        thread's unit of work (db.transaction), so database calls made while
+        iterating are not nested inside this read. The connection goes back to
+        the pool once the iterator is exhausted or closed; close iterators
+        that are abandoned early (e.g. with contextlib.closing).
+        """
+        conn = self.db.acquire()
+        try:
+            cursor = conn.cursor(name=name, cursor_factory=RealDictCursor)
+            cursor.itersize = fetch_size
+            try:
+                cursor.execute(query, params)
+                for row in cursor:
+                    yield dict(row)
+            finally:
+                cursor.close()
+        finally:
+            # Read-only; release() rolls back the open transaction
+            self.db.release(conn)
+
+    @staticmethod
+    def _mention_filters(days: Optional[int], subreddit: Optional[str]) -> Tuple[str, str, Dict[str, Any]]:
+        """JOIN and WHERE clauses for a time window and subreddit over ticker_mentions m"""
+
+        join, conditions, params = "", [], {}
+
+        # Filtering on created_utc itself lets Postgres prune monthly partitions
+        if days is not None:
+            params["since"] = datetime.now() - timedelta(days=days)
+            conditions.append("m.created_utc >= %(since)s")
+
+        if subreddit is not None:
+            params["subreddit"] = subreddit
+            join = "JOIN reddit_posts p ON p.id = m.post_id AND p.created_utc = m.created_utc"
+            conditions.append("p.subreddit = %(subreddit)s")
+            if days is not None:
+                conditions.append("p.created_utc >= %(since)s")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return join, where, params
+
+    def top_tickers(self, limit: Optional[int] = 10, days: Optional[int] = None, subreddit: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Tickers by mention count with average sentiment and label counts.
+
+        Without a window or subreddit this reads the incrementally maintained
+        ticker_mention_stats table; otherwise it aggregates the matching
+        mentions. `limit=None` returns every ticker.
+        """
+
+        def load():
+            if days is None and subreddit is None:
+                return self._query("""
+                    SELECT
+                        ticker,
+                        mention_count,
+                        ROUND(score_sum / NULLIF(mention_count, 0), 2) AS avg_sentiment_score,
+                        positive_count,
+                        negative_count,
+                        neutral_count
+                    FROM ticker_mention_stats
+                    WHERE mention_count > 0
+                    ORDER BY mention_count DESC
+                    LIMIT %(limit)s
+                """, {"limit": limit})
+
+            join, where, params = self._mention_filters(days, subreddit)
+            return self._query(f"""
+                SELECT
+                    m.ticker,
+                    COUNT(*) AS mention_count,
+                    ROUND(AVG(m.sentiment_score), 2) AS avg_sentiment_score,
+                    COUNT(*) FILTER (WHERE m.sentiment_label = 'positive') AS positive_count,
+                    COUNT(*) FILTER (WHERE m.sentiment_label = 'negative') AS negative_count,
+                    COUNT(*) FILTER (WHERE m.sentiment_label = 'neutral') AS neutral_count
+                FROM ticker_mentions m
+                {join}
+                {where}
+                GROUP BY m.ticker
+                ORDER BY mention_count DESC
+                LIMIT %(limit)s
+            """, {**params, "limit": limit})
+
+        return self._cached(("top_tickers", limit, days, subreddit), load)
+
+    def sentiment_trends(self, tickers: Optional[List[str]] = None, days: int = 30, subreddit: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Daily mention count and average sentiment per ticker over the window"""
+
+        def load():
+            join, where, params = self._mention_filters(days, subreddit)
+            if tickers:
+                params["tickers"] = list(tickers)
+                where += " AND m.ticker = ANY(%(tickers)s)" if where else "WHERE m.ticker = ANY(%(tickers)s)"
+
+            return self._query(f"""
+                SELECT
+                    m.ticker,
+                    date_trunc('day', m.created_utc) AS day,
+                    COUNT(*) AS mention_count,
+                    ROUND(AVG(m.sentiment_score), 2) AS avg_sentiment_score
+                FROM ticker_mentions m
+                {join}
+                {where}
+                GROUP BY m.ticker, day
+                ORDER BY m.ticker, day
+            """, params)
+
+        key = ("sentiment_trends", tuple(sorted(tickers)) if tickers else None, days, subreddit)
+        return self._cached(key, load)
+
+    def stock_prices(self, tickers: List[str], days: int = 90) -> List[Dict[str, Any]]:
+        """Daily closing prices and volume for the given tickers"""
+
+        def load():
+            return self._query("""
+                SELECT ticker, date, close_price, volume
+                FROM stock_data
+                WHERE ticker = ANY(%(tickers)s) AND date >= %(since)s
+                ORDER BY ticker, date
+            """, {"tickers": list(tickers), "since": (datetime.now() - timedelta(days=days)).date()})
+
+        return self._cached(("stock_prices", tuple(sorted(tickers)), days), load)
+
+    def iter_mentions(self, days: Optional[int] = None, subreddit: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream raw ticker mentions (e.g. for exports) through a server-side cursor"""
+
+        join, where, params = self._mention_filters(days, subreddit)
+        return self.iter_rows(f"""
+            SELECT m.post_id, m.created_utc, m.ticker, m.sentiment_label, m.sentiment_score, m.context
+            FROM ticker_mentions m
+            {join}
+            {where}
+            ORDER BY m.created_utc
+        """, params, name="dashboard_mentions")
+
+
+dashboard = DashboardData()
+
+
+if __name__ == "__main__":
+    # Testing: the second call should be served from the cache
+    for attempt in range(2):
+        start = time.perf_counter()
+        rows = dashboard.top_tickers(limit=10, days=30)
+        print(f"top_tickers: {len(rows)} rows in {(time.perf_counter() - start) * 1000:.2f} ms")
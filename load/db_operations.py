@@ -1,47 +1,197 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
+import pandas as pd
 import logging
-from typing import Dict, List, Any
-from datetime import datetime
+import hashlib
+import io
+import os
+import re
+from typing import Dict, List, Any, Iterable, Sequence, Optional, Set, Union
+from datetime import datetime, date, timedelta
 
 from configs.db_connection import db
+from load.dashboard import dashboard
+from extract.stock_series import StockSeries
 from configs.logging_config import setup_logging
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Monthly partitions older than this are rolled up and dropped; 0 keeps everything
+# Dropping partitions deletes the raw posts and mentions for good; off unless configured
+partition_retention_months = int(os.getenv("PARTITION_RETENTION_MONTHS", "0"))
+
+# Tables range-partitioned by month on created_utc, parents first
+_PARTITIONED_TABLES = ("reddit_posts", "ticker_mentions")
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def _article_hash(article: Dict[str, Any]) -> str:
+    """Identity of a news article: its URL, or title/source/published_at when it has none"""
+
+    url = (article.get('url') or '').strip().rstrip('/')
+    key = url or f"{article.get('title', '')}|{article.get('source', '')}|{article.get('published_at', '')}"
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+def _format_copy_value(value: Any) -> str:
+    """Format a value for COPY ... FROM STDIN in text format"""
+
+    if value is None:
+        return "\\N"
+
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> None:
+    """Stream rows into a table with COPY in a single round trip"""
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_format_copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def _month_start(value: Any) -> date:
+    """First day of the month a timestamp (datetime, date or epoch seconds) falls in"""
+
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value)
+    return date(value.year, value.month, 1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+# Add a per-ticker delta (one row per ticker) to the running aggregates
+_MERGE_TICKER_STATS = """
+    INSERT INTO ticker_mention_stats AS s
+        (ticker, mention_count, score_sum, positive_count, negative_count, neutral_count, updated_at)
+    SELECT ticker, mention_count, score_sum, positive_count, negative_count, neutral_count, CURRENT_TIMESTAMP
+    FROM ({delta}) AS delta
+    ON CONFLICT (ticker) DO UPDATE SET
+        mention_count = s.mention_count + EXCLUDED.mention_count,
+        score_sum = s.score_sum + EXCLUDED.score_sum,
+        positive_count = s.positive_count + EXCLUDED.positive_count,
+        negative_count = s.negative_count + EXCLUDED.negative_count,
+        neutral_count = s.neutral_count + EXCLUDED.neutral_count,
+        updated_at = EXCLUDED.updated_at
+"""
+
+_TICKER_STATS_COLUMNS = """
+    ticker,
+    COUNT(*) AS mention_count,
+    COALESCE(SUM(sentiment_score), 0) AS score_sum,
+    COUNT(*) FILTER (WHERE sentiment_label = 'positive') AS positive_count,
+    COUNT(*) FILTER (WHERE sentiment_label = 'negative') AS negative_count,
+    COUNT(*) FILTER (WHERE sentiment_label = 'neutral') AS neutral_count
+"""
+
+
+def _recompute_ticker_stats(cursor, tickers: Iterable[str]) -> None:
+    """
+    Recompute the aggregates of a few tickers from ticker_mentions.
+
+    Used where mentions can be updated or deleted in place, so adding a delta
+    is not enough. Only the given tickers' mentions are scanned.
+    """
+    tickers = list(set(tickers))
+    if not tickers:
+        return
+
+    # Tickers left with no mentions are reset to zero rather than deleted
+    cursor.execute("""
+        INSERT INTO ticker_mention_stats
+            (ticker, mention_count, score_sum, positive_count, negative_count, neutral_count, updated_at)
+        SELECT
+            t.ticker,
+            COUNT(m.ticker),
+            COALESCE(SUM(m.sentiment_score), 0),
+            COUNT(*) FILTER (WHERE m.sentiment_label = 'positive'),
+            COUNT(*) FILTER (WHERE m.sentiment_label = 'negative'),
+            COUNT(*) FILTER (WHERE m.sentiment_label = 'neutral'),
+            CURRENT_TIMESTAMP
+        FROM unnest(%s::VARCHAR[]) AS t(ticker)
+        LEFT JOIN ticker_mentions m ON m.ticker = t.ticker
+        GROUP BY t.ticker
+        ON CONFLICT (ticker) DO UPDATE SET
+            mention_count = EXCLUDED.mention_count,
+            score_sum = EXCLUDED.score_sum,
+            positive_count = EXCLUDED.positive_count,
+            negative_count = EXCLUDED.negative_count,
+            neutral_count = EXCLUDED.neutral_count,
+            updated_at = EXCLUDED.updated_at
+    """, (tickers,))
+
 
 class DatabaseOperations:
     def __init__(self):
         self.db = db
+        # Months whose partitions are known to exist in this process
+        self._partition_months: Set[date] = set()
+
+    def transaction(self):
+        """
+        Share one pooled connection and transaction across several operations.
+
+        Calls made inside the block join the transaction (each in its own
+        savepoint) and everything is committed once at the end.
+        """
+        return self.db.transaction()
 
     def insert_reddit_data(self, post_data: Dict[str, Any]) -> int:
         """
         Insert Reddit data into the database and return the ID of the inserted row.
+
+        If a post with the same Reddit id is already stored, its existing ID is returned.
         """
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-
-            query = """
-                INSERT INTO reddit_posts (title, body, subreddit, post_score, comment_count, created_utc)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """
-
-            cursor.execute(query, (
-                post_data['title'],
-                post_data['body'],
-                post_data['subreddit'],
-                post_data['post_score'],
-                post_data['comment_count'],
-                post_data['created_utc']
-            ))
-
-            post_id = cursor.fetchone()[0]
-            conn.commit()
-            cursor.close()
-            conn.close()
+            self.ensure_partitions([post_data['created_utc']])
+
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+
+                query = """
+                    INSERT INTO reddit_posts (reddit_id, title, body, subreddit, post_score, comment_count, created_utc)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (reddit_id, created_utc) DO NOTHING
+                    RETURNING id
+                """
+
+                cursor.execute(query, (
+                    post_data.get('reddit_id'),
+                    post_data['title'],
+                    post_data['body'],
+                    post_data['subreddit'],
+                    post_data['post_score'],
+                    post_data['comment_count'],
+                    post_data['created_utc']
+                ))
+
+                row = cursor.fetchone()
+                if row is None:
+                    cursor.execute(
+                        "SELECT id FROM reddit_posts WHERE reddit_id = %s AND created_utc = %s",
+                        (post_data['reddit_id'], post_data['created_utc'])
+                    )
+                    row = cursor.fetchone()
+
+                post_id = row[0]
+                cursor.close()
 
             logger.info(f"Inserted Reddit data with ID: {post_id}")
             return post_id
@@ -50,36 +200,92 @@ class DatabaseOperations:
             logger.error(f"Error inserting Reddit data: {str(e)}")
             return None
 
-    def insert_ticker_mentions(self, post_id: int, ticker_sentiments: Dict[str, Any]) -> int:
+    def get_existing_reddit_ids(self, reddit_ids: List[str]) -> Set[str]:
+        """Return which of the given Reddit post ids are already stored, in one query"""
+
+        if not reddit_ids:
+            return set()
+
+        try:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(
+                    "SELECT reddit_id FROM reddit_posts WHERE reddit_id = ANY(%s)",
+                    (list(reddit_ids),)
+                )
+                existing = {row[0] for row in cursor.fetchall()}
+                cursor.close()
+
+            return existing
+
+        except Exception as e:
+            logger.error(f"Error checking existing Reddit ids: {str(e)}")
+            return set()
+
+    def insert_ticker_mentions(self, post_id: int, ticker_sentiments: Dict[str, Any], created_utc: Optional[datetime] = None) -> int:
         """
         Insert ticker mentions with sentiment data into the database and return the ID of the inserted row.
+
+        `created_utc` is the post's creation time (the partition key); it is
+        looked up from reddit_posts when not given.
         """
 
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
 
-            for ticker, sentiment_data in ticker_sentiments.items():
-                query = """
-                    INSERT INTO ticker_mentions (post_id, ticker, sentiment_label, sentiment_score, context)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (post_id, ticker) DO UPDATE SET
-                        sentiment_label = EXCLUDED.sentiment_label,
-                        sentiment_score = EXCLUDED.sentiment_score,
-                        context = EXCLUDED.context
-                """
+                if created_utc is None:
+                    cursor.execute("SELECT created_utc FROM reddit_posts WHERE id = %s", (post_id,))
+                    created_utc = cursor.fetchone()[0]
 
-                cursor.execute(query, (
-                    post_id,
-                    ticker,
-                    sentiment_data['label'],
-                    sentiment_data['score'],
-                    sentiment_data.get('context', '')
-                ))
+                # Mentions this call overwrites, locked so the delta below stays exact
+                cursor.execute("""
+                    SELECT ticker, sentiment_label, sentiment_score
+                    FROM ticker_mentions
+                    WHERE post_id = %s AND created_utc = %s AND ticker = ANY(%s)
+                    FOR UPDATE
+                """, (post_id, created_utc, list(ticker_sentiments.keys())))
+                replaced = cursor.fetchall()
 
-            conn.commit()
-            cursor.close()
-            conn.close()
+                for ticker, sentiment_data in ticker_sentiments.items():
+                    query = """
+                        INSERT INTO ticker_mentions (post_id, created_utc, ticker, sentiment_label, sentiment_score, context)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                        ON CONFLICT (post_id, ticker, created_utc) DO UPDATE SET
+                            sentiment_label = EXCLUDED.sentiment_label,
+                            sentiment_score = EXCLUDED.sentiment_score,
+                            context = EXCLUDED.context
+                    """
+
+                    cursor.execute(query, (
+                        post_id,
+                        created_utc,
+                        ticker,
+                        sentiment_data['label'],
+                        sentiment_data['score'],
+                        sentiment_data.get('context', '')
+                    ))
+
+                # Add this post's new mentions and take back the ones they replaced,
+                # so only the post's own rows are read, not each ticker's history
+                delta = [(ticker, data['label'], data['score'], 1) for ticker, data in ticker_sentiments.items()]
+                delta += [(ticker, label, score, -1) for ticker, label, score in replaced]
+
+                if delta:
+                    cursor.execute(_MERGE_TICKER_STATS.format(delta="""
+                        SELECT
+                            ticker,
+                            SUM(sign) AS mention_count,
+                            COALESCE(SUM(sign * sentiment_score::DECIMAL(3,2)), 0) AS score_sum,
+                            COALESCE(SUM(sign) FILTER (WHERE sentiment_label = 'positive'), 0) AS positive_count,
+                            COALESCE(SUM(sign) FILTER (WHERE sentiment_label = 'negative'), 0) AS negative_count,
+                            COALESCE(SUM(sign) FILTER (WHERE sentiment_label = 'neutral'), 0) AS neutral_count
+                        FROM unnest(%s::VARCHAR[], %s::VARCHAR[], %s::NUMERIC[], %s::INTEGER[])
+                            AS m(ticker, sentiment_label, sentiment_score, sign)
+                        GROUP BY ticker
+                    """), [list(column) for column in zip(*delta)])
+                cursor.close()
             
             logger.info(f"Inserted {len(ticker_sentiments)} ticker mentions for post {post_id}")
             return True
@@ -88,47 +294,252 @@ class DatabaseOperations:
             logger.error(f"Error inserting ticker mentions: {str(e)}")
             return False
 
+    def bulk_load_reddit_data(self, posts: List[Dict[str, Any]], reddit_cursors: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[List[int]]:
+        """
+        Load many posts and their ticker mentions in one transaction.
+
+        Post ids are reserved from the sequence up front, then posts and
+        mentions are staged with COPY into temp tables and merged into
+        reddit_posts / ticker_mentions. Posts whose Reddit id is already
+        stored are skipped along with their mentions. The new mentions are
+        added to ticker_mention_stats in the same transaction, and the
+        extraction high-water marks in `reddit_cursors` (see
+        update_reddit_cursors) are advanced with them. Monthly partitions for
+        the posts' creation times are created first.
+
+        Returns the new post ids in the same order as `posts` (None for skipped
+        posts), or None on error.
+        """
+        if not posts:
+            return []
+
+        try:
+            self.ensure_partitions(post['created_utc'] for post in posts)
+
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+
+                # Reserve ids for every post in one round trip
+                cursor.execute(
+                    "SELECT nextval(pg_get_serial_sequence('reddit_posts', 'id')) FROM generate_series(1, %s)",
+                    (len(posts),)
+                )
+                post_ids = [row[0] for row in cursor.fetchall()]
+
+                cursor.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS tmp_reddit_posts (
+                        id INTEGER,
+                        reddit_id VARCHAR(20),
+                        title TEXT,
+                        body TEXT,
+                        subreddit VARCHAR(50),
+                        post_score INTEGER,
+                        comment_count INTEGER,
+                        created_utc TIMESTAMP
+                    ) ON COMMIT DROP
+                """)
+                cursor.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS tmp_ticker_mentions (
+                        post_id INTEGER,
+                        created_utc TIMESTAMP,
+                        ticker VARCHAR(10),
+                        sentiment_label VARCHAR(20),
+                        sentiment_score DECIMAL(3,2),
+                        context TEXT
+                    ) ON COMMIT DROP
+                """)
+                cursor.execute("TRUNCATE tmp_reddit_posts, tmp_ticker_mentions")
+
+                post_columns = ("id", "reddit_id", "title", "body", "subreddit", "post_score", "comment_count", "created_utc")
+                _copy_rows(cursor, "tmp_reddit_posts", post_columns, (
+                    (
+                        post_id,
+                        post.get('reddit_id'),
+                        post['title'],
+                        post['body'],
+                        post['subreddit'],
+                        post['post_score'],
+                        post['comment_count'],
+                        post['created_utc']
+                    )
+                    for post_id, post in zip(post_ids, posts)
+                ))
+
+                mention_columns = ("post_id", "created_utc", "ticker", "sentiment_label", "sentiment_score", "context")
+                _copy_rows(cursor, "tmp_ticker_mentions", mention_columns, (
+                    (
+                        post_id,
+                        post['created_utc'],
+                        ticker,
+                        sentiment_data['label'],
+                        sentiment_data['score'],
+                        sentiment_data.get('context', '')
+                    )
+                    for post_id, post in zip(post_ids, posts)
+                    for ticker, sentiment_data in post.get('ticker_sentiments', {}).items()
+                ))
+
+                cursor.execute("""
+                    INSERT INTO reddit_posts (id, reddit_id, title, body, subreddit, post_score, comment_count, created_utc)
+                    SELECT id, reddit_id, title, body, subreddit, post_score, comment_count, created_utc
+                    FROM tmp_reddit_posts
+                    ON CONFLICT (reddit_id, created_utc) DO NOTHING
+                    RETURNING id
+                """)
+                inserted = {row[0] for row in cursor.fetchall()}
+
+                cursor.execute("""
+                    INSERT INTO ticker_mentions (post_id, created_utc, ticker, sentiment_label, sentiment_score, context)
+                    SELECT post_id, created_utc, ticker, sentiment_label, sentiment_score, context
+                    FROM tmp_ticker_mentions
+                    WHERE post_id = ANY(%s)
+                    ON CONFLICT (post_id, ticker, created_utc) DO UPDATE SET
+                        sentiment_label = EXCLUDED.sentiment_label,
+                        sentiment_score = EXCLUDED.sentiment_score,
+                        context = EXCLUDED.context
+                """, (list(inserted),))
+                mention_count = cursor.rowcount
+
+                # Every loaded post is new, so its mentions are a pure delta on the aggregates
+                cursor.execute(_MERGE_TICKER_STATS.format(delta=f"""
+                    SELECT {_TICKER_STATS_COLUMNS}
+                    FROM tmp_ticker_mentions
+                    WHERE post_id = ANY(%s)
+                    GROUP BY ticker
+                """), (list(inserted),))
+                cursor.close()
+
+                # If this fails the marks stay behind and the posts are re-fetched (and skipped) next run
+                self.update_reddit_cursors(reddit_cursors or {})
+
+            skipped = len(post_ids) - len(inserted)
+            logger.info(f"Bulk loaded {len(inserted)} Reddit posts with {mention_count} ticker mentions ({skipped} already stored)")
+            return [post_id if post_id in inserted else None for post_id in post_ids]
+
+        except Exception as e:
+            logger.error(f"Error bulk loading Reddit data: {str(e)}")
+            return None
+
     def insert_news_articles(self, ticker: str, articles: List[Dict[str, Any]]) -> bool:
         """Insert news articles for a ticker"""
+
+        return self.bulk_insert_news({ticker: articles}) is not None
+
+    def get_latest_news_dates(self, tickers: List[str]) -> Dict[str, datetime]:
+        """
+        Return the latest stored published_at for each ticker in a single query.
+
+        Tickers with no stored articles are omitted.
+        """
+        if not tickers:
+            return {}
+
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            for article in articles:
-                query = """
-                    INSERT INTO news_articles (ticker, title, description, url, source, published_at, content)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute("""
+                    SELECT t.ticker, MAX(a.published_at)
+                    FROM news_article_tickers t
+                    JOIN news_articles a ON a.id = t.article_id
+                    WHERE t.ticker = ANY(%s)
+                    GROUP BY t.ticker
+                """, (list(tickers),))
+                latest = {ticker: published_at for ticker, published_at in cursor.fetchall() if published_at}
+                cursor.close()
+
+            return latest
+
+        except Exception as e:
+            logger.error(f"Error getting latest news dates: {str(e)}")
+            return {}
+
+    def bulk_insert_news(self, news_data: Dict[str, List[Dict[str, Any]]]) -> Optional[int]:
+        """
+        Store the articles of many tickers, each distinct article once.
+
+        Articles are identified by content hash (see _article_hash). Only
+        hashes not already in news_articles are inserted, and every
+        (article, ticker) pair is recorded in news_article_tickers, so an
+        article returned for several tickers is shared between them.
+
+        Returns the number of new articles stored, or None on error.
+        """
+        articles: Dict[str, Dict[str, Any]] = {}
+        links = set()
+        for ticker, ticker_articles in news_data.items():
+            for article in ticker_articles:
+                content_hash = _article_hash(article)
+                articles.setdefault(content_hash, {**article, 'ticker': ticker})
+                links.add((content_hash, ticker))
+
+        if not articles:
+            return 0
+
+        try:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(
+                    "SELECT content_hash FROM news_articles WHERE content_hash = ANY(%s)",
+                    (list(articles),)
+                )
+                existing = {row[0] for row in cursor.fetchall()}
+                new = [(content_hash, article) for content_hash, article in articles.items() if content_hash not in existing]
+
+                if new:
+                    # ON CONFLICT covers a concurrent load storing the same article first
+                    cursor.execute("""
+                        INSERT INTO news_articles (ticker, title, description, url, source, published_at, content, content_hash)
+                        SELECT * FROM unnest(
+                            %s::VARCHAR[], %s::TEXT[], %s::TEXT[], %s::TEXT[],
+                            %s::VARCHAR[], %s::TIMESTAMP[], %s::TEXT[], %s::VARCHAR[]
+                        )
+                        ON CONFLICT (content_hash) DO NOTHING
+                    """, (
+                        [article['ticker'] for _, article in new],
+                        [article['title'] for _, article in new],
+                        [article.get('description') for _, article in new],
+                        [article.get('url') for _, article in new],
+                        [article.get('source') for _, article in new],
+                        [article.get('published_at') for _, article in new],
+                        [article.get('content') for _, article in new],
+                        [content_hash for content_hash, _ in new],
+                    ))
+                    inserted = cursor.rowcount
+                else:
+                    inserted = 0
+
+                cursor.execute("""
+                    INSERT INTO news_article_tickers (article_id, ticker)
+                    SELECT a.id, l.ticker
+                    FROM unnest(%s::VARCHAR[], %s::VARCHAR[]) AS l(content_hash, ticker)
+                    JOIN news_articles a ON a.content_hash = l.content_hash
                     ON CONFLICT DO NOTHING
-                """
-                
-                cursor.execute(query, (
-                    ticker,
-                    article['title'],
-                    article['description'],
-                    article['url'],
-                    article['source'],
-                    article['published_at'],
-                    article['content']
-                ))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            logger.info(f"Inserted {len(articles)} news articles for {ticker}")
-            return True
-            
+                """, ([content_hash for content_hash, _ in links], [ticker for _, ticker in links]))
+                linked = cursor.rowcount
+                cursor.close()
+
+            logger.info(
+                f"Stored {inserted} new news articles ({len(existing)} already stored), "
+                f"{linked} new article-ticker links"
+            )
+            return inserted
+
         except Exception as e:
             logger.error(f"Error inserting news articles: {str(e)}")
-            return False
+            return None
 
     def insert_stock_data(self, ticker: str, stock_data: Dict[str, Any]) -> bool:
         """Insert stock data for a ticker"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
+            daily_data = stock_data['daily_data']
+            if not isinstance(daily_data, StockSeries):
+                daily_data = StockSeries.from_dict(daily_data)
+
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
             
-            for date, data in stock_data['daily_data'].items():
                 query = """
                     INSERT INTO stock_data (ticker, date, open_price, high_price, low_price, close_price, volume)
                     VALUES (%s, %s, %s, %s, %s, %s, %s)
@@ -140,19 +551,10 @@ class DatabaseOperations:
                         volume = EXCLUDED.volume
                 """
                 
-                cursor.execute(query, (
-                    ticker,
-                    date,
-                    data['open'],
-                    data['high'],
-                    data['low'],
-                    data['close'],
-                    data['volume']
-                ))
+                # Rows come straight off the series' arrays, no per-day dicts
+                cursor.executemany(query, ((ticker, *row) for row in daily_data.rows()))
             
-            conn.commit()
-            cursor.close()
-            conn.close()
+                cursor.close()
             
             logger.info(f"Inserted stock data for {ticker}")
             return True
@@ -162,19 +564,473 @@ class DatabaseOperations:
             return False
 
 
+    def bulk_insert_stock_data(self, stock_data: Union[pd.DataFrame, Dict[str, Dict[str, Any]]]) -> Optional[int]:
+        """
+        Upsert the daily series of many tickers in one statement.
+
+        Takes the columnar frame from get_daily_stock_batch (or the
+        {ticker: {'daily_data': StockSeries or {date: values}}} form of
+        get_daily_stock_data, which is converted to one), COPYs it into a temp table and merges it into stock_data. Rows
+        whose values did not change are left untouched.
+
+        Returns the number of rows inserted or updated, or None on error.
+        """
+        columns = ["ticker", "date", "open", "high", "low", "close", "volume"]
+
+        if isinstance(stock_data, pd.DataFrame):
+            batch = stock_data[columns]
+        else:
+            frames = []
+            for ticker, data in stock_data.items():
+                daily_data = data.get('daily_data') or {}
+                if not daily_data:
+                    continue
+
+                if isinstance(daily_data, StockSeries):
+                    frames.append(daily_data.to_frame(ticker))
+                    continue
+
+                frame = pd.DataFrame.from_dict(daily_data, orient="index", columns=columns[2:])
+                frame.insert(0, "date", frame.index)
+                frame.insert(0, "ticker", ticker)
+                frames.append(frame)
+
+            if not frames:
+                return 0
+
+            batch = pd.concat(frames, ignore_index=True)[columns]
+
+        if batch.empty:
+            return 0
+
+        batch = batch.drop_duplicates(subset=["ticker", "date"], keep="last")
+        batch[["open", "high", "low", "close"]] = batch[["open", "high", "low", "close"]].round(2)
+
+        buffer = io.StringIO()
+        batch.to_csv(buffer, sep="\t", header=False, index=False, na_rep="\\N")
+        buffer.seek(0)
+
+        try:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS tmp_stock_data (
+                        ticker VARCHAR(10),
+                        date DATE,
+                        open_price DECIMAL(10,2),
+                        high_price DECIMAL(10,2),
+                        low_price DECIMAL(10,2),
+                        close_price DECIMAL(10,2),
+                        volume BIGINT
+                    ) ON COMMIT DROP
+                """)
+                cursor.execute("TRUNCATE tmp_stock_data")
+                cursor.copy_expert(
+                    "COPY tmp_stock_data (ticker, date, open_price, high_price, low_price, close_price, volume) FROM STDIN",
+                    buffer
+                )
+
+                cursor.execute("""
+                    INSERT INTO stock_data (ticker, date, open_price, high_price, low_price, close_price, volume)
+                    SELECT ticker, date, open_price, high_price, low_price, close_price, volume
+                    FROM tmp_stock_data
+                    ON CONFLICT (ticker, date) DO UPDATE SET
+                        open_price = EXCLUDED.open_price,
+                        high_price = EXCLUDED.high_price,
+                        low_price = EXCLUDED.low_price,
+                        close_price = EXCLUDED.close_price,
+                        volume = EXCLUDED.volume
+                    WHERE (stock_data.open_price, stock_data.high_price, stock_data.low_price,
+                           stock_data.close_price, stock_data.volume)
+                        IS DISTINCT FROM
+                          (EXCLUDED.open_price, EXCLUDED.high_price, EXCLUDED.low_price,
+                           EXCLUDED.close_price, EXCLUDED.volume)
+                """)
+                changed = cursor.rowcount
+                cursor.close()
+
+        except Exception as e:
+            logger.error(f"Error bulk inserting stock data: {str(e)}")
+            return None
+
+        logger.info(f"Upserted {changed} of {len(batch)} stock rows for {batch['ticker'].nunique()} tickers")
+        return changed
+
+    def get_latest_stock_dates(self, tickers: List[str]) -> Dict[str, date]:
+        """
+        Return the latest stored date for each ticker in a single query.
+
+        Tickers with no stored rows are omitted.
+        """
+        if not tickers:
+            return {}
+
+        try:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute("""
+                    SELECT ticker, MAX(date)
+                    FROM stock_data
+                    WHERE ticker = ANY(%s)
+                    GROUP BY ticker
+                """, (list(tickers),))
+                latest = dict(cursor.fetchall())
+                cursor.close()
+
+            return latest
+
+        except Exception as e:
+            logger.error(f"Error getting latest stock dates: {str(e)}")
+            return {}
+
+    def get_reddit_cursors(self, subreddits: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the extraction high-water mark for each subreddit.
+
+        Returns {subreddit: {'last_fullname': ..., 'last_created_utc': ...}};
+        subreddits that were never extracted are omitted.
+        """
+        try:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+                cursor.execute("""
+                    SELECT subreddit, last_fullname, last_created_utc
+                    FROM reddit_cursors
+                    WHERE subreddit = ANY(%s)
+                """, (list(subreddits),))
+                results = cursor.fetchall()
+                cursor.close()
+
+            return {row['subreddit']: dict(row) for row in results}
+
+        except Exception as e:
+            logger.error(f"Error getting Reddit cursors: {str(e)}")
+            return {}
+
+    def update_reddit_cursors(self, cursors: Dict[str, Dict[str, Any]]) -> bool:
+        """
+        Advance the extraction high-water mark for each subreddit.
+
+        The mark never moves backwards.
+        """
+        if not cursors:
+            return True
+
+        try:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+
+                query = """
+                    INSERT INTO reddit_cursors (subreddit, last_fullname, last_created_utc, updated_at)
+                    VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                    ON CONFLICT (subreddit) DO UPDATE SET
+                        last_fullname = EXCLUDED.last_fullname,
+                        last_created_utc = EXCLUDED.last_created_utc,
+                        updated_at = EXCLUDED.updated_at
+                    WHERE reddit_cursors.last_created_utc < EXCLUDED.last_created_utc
+                """
+
+                for subreddit, mark in cursors.items():
+                    cursor.execute(query, (subreddit, mark['last_fullname'], mark['last_created_utc']))
+
+                cursor.close()
+
+            logger.info(f"Updated Reddit cursors for {len(cursors)} subreddits")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error updating Reddit cursors: {str(e)}")
+            return False
+
+    def ensure_partitions(self, created_utcs: Iterable[Any]) -> bool:
+        """
+        Create the monthly partitions of reddit_posts / ticker_mentions that
+        rows with these creation times will land in.
+
+        Each month is created in its own short transaction under an advisory
+        lock, so concurrent loads don't race on the DDL and one failing month
+        doesn't undo the others. Rows of that month already sitting in the
+        DEFAULT partitions (Postgres refuses to create the partition while
+        they are there) are moved into the new partitions in the same
+        transaction. Months already seen by this process are skipped without
+        a round trip.
+
+        Returns False if any month could not be created; its rows keep
+        landing in the DEFAULT partitions until a later call succeeds.
+        """
+        months = {_month_start(value) for value in created_utcs if value is not None} - self._partition_months
+        if not months:
+            return True
+
+        created = 0
+        for month in sorted(months):
+            try:
+                with self.db.transaction() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT pg_advisory_xact_lock(hashtext('ensure_partitions'))")
+                    self._create_month_partitions(cursor, month)
+                    cursor.close()
+
+                self._partition_months.add(month)
+                created += 1
+
+            except Exception as e:
+                logger.error(f"Error creating partitions for {month:%Y-%m}: {str(e)}")
+
+        logger.info(f"Ensured partitions for {created} of {len(months)} months")
+        return created == len(months)
+
+    @staticmethod
+    def _create_month_partitions(cursor, month: date):
+        """Create one month's partitions, moving its rows out of the DEFAULT partitions first"""
+
+        bounds = (month, _next_month(month))
+        in_month = "created_utc >= %s AND created_utc < %s"
+
+        missing = []
+        for table in _PARTITIONED_TABLES:
+            cursor.execute("SELECT to_regclass(%s) IS NULL", (_partition_name(table, month),))
+            if cursor.fetchone()[0]:
+                missing.append(table)
+
+        # Mentions reference posts with the same created_utc, so taking them out
+        # first and putting them back last keeps every FK intact
+        for table in reversed(missing):
+            cursor.execute(
+                f"CREATE TEMP TABLE moved_{table} ON COMMIT DROP AS "
+                f"SELECT * FROM {table}_default WHERE {in_month}",
+                bounds
+            )
+            cursor.execute(f"DELETE FROM {table}_default WHERE {in_month}", bounds)
+
+        for table in missing:
+            cursor.execute(
+                f"CREATE TABLE {_partition_name(table, month)} "
+                f"PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+                bounds
+            )
+            cursor.execute(f"INSERT INTO {table} SELECT * FROM moved_{table}")
+            if cursor.rowcount:
+                logger.info(f"Moved {cursor.rowcount} {month:%Y-%m} rows out of {table}_default")
+
+    @staticmethod
+    def _roll_up_mentions(cursor, source: str, params: Optional[Sequence] = None):
+        """
+        Fold expiring mentions (a SELECT over `source`) into ticker_daily_rollup
+        and subtract them from ticker_mention_stats, which covers retained
+        mentions only. The rollup is additive: a day can be folded in from a
+        monthly partition and from the DEFAULT partition.
+        """
+        cursor.execute(f"""
+            INSERT INTO ticker_daily_rollup
+                (ticker, day, mention_count, score_sum, positive_count, negative_count, neutral_count)
+            SELECT
+                ticker,
+                created_utc::DATE AS day,
+                COUNT(*),
+                COALESCE(SUM(sentiment_score), 0),
+                COUNT(*) FILTER (WHERE sentiment_label = 'positive'),
+                COUNT(*) FILTER (WHERE sentiment_label = 'negative'),
+                COUNT(*) FILTER (WHERE sentiment_label = 'neutral')
+            FROM ({source}) AS expiring
+            GROUP BY ticker, day
+            ON CONFLICT (ticker, day) DO UPDATE SET
+                mention_count = ticker_daily_rollup.mention_count + EXCLUDED.mention_count,
+                score_sum = ticker_daily_rollup.score_sum + EXCLUDED.score_sum,
+                positive_count = ticker_daily_rollup.positive_count + EXCLUDED.positive_count,
+                negative_count = ticker_daily_rollup.negative_count + EXCLUDED.negative_count,
+                neutral_count = ticker_daily_rollup.neutral_count + EXCLUDED.neutral_count
+        """, params)
+
+        cursor.execute(_MERGE_TICKER_STATS.format(delta=f"""
+            SELECT
+                ticker,
+                -COUNT(*) AS mention_count,
+                -COALESCE(SUM(sentiment_score), 0) AS score_sum,
+                -COUNT(*) FILTER (WHERE sentiment_label = 'positive') AS positive_count,
+                -COUNT(*) FILTER (WHERE sentiment_label = 'negative') AS negative_count,
+                -COUNT(*) FILTER (WHERE sentiment_label = 'neutral') AS neutral_count
+            FROM ({source}) AS expiring
+            GROUP BY ticker
+        """), params)
+
+    def drop_old_partitions(self, retain_months: int = partition_retention_months) -> int:
+        """
+        Roll up and drop monthly partitions older than `retain_months`.
+
+        For each expired month, ticker mentions are aggregated per ticker and
+        day into ticker_daily_rollup and subtracted from ticker_mention_stats,
+        then the ticker_mentions and reddit_posts partitions are detached and
+        dropped, all in one transaction per month. Expired rows left in the
+        DEFAULT partitions are rolled up and deleted the same way.
+
+        This permanently deletes the raw posts and mentions, so it does
+        nothing unless `retain_months` (PARTITION_RETENTION_MONTHS) is set.
+
+        Returns the number of months dropped.
+        """
+        if retain_months <= 0:
+            return 0
+
+        today = date.today()
+        cutoff = date(today.year, today.month, 1)
+        for _ in range(retain_months):
+            cutoff = _month_start(cutoff - timedelta(days=1))
+
+        try:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT child.relname
+                    FROM pg_inherits
+                    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                    WHERE parent.relname = 'ticker_mentions'
+                """)
+                partitions = [row[0] for row in cursor.fetchall()]
+                cursor.close()
+
+        except Exception as e:
+            logger.error(f"Error listing partitions: {str(e)}")
+            return 0
+
+        expired = []
+        for name in partitions:
+            match = _PARTITION_SUFFIX.search(name)
+            if match:
+                month = date(int(match.group(1)), int(match.group(2)), 1)
+                if month < cutoff:
+                    expired.append(month)
+
+        dropped = 0
+        for month in sorted(expired):
+            mentions = _partition_name("ticker_mentions", month)
+            posts = _partition_name("reddit_posts", month)
+
+            try:
+                with self.db.transaction() as conn:
+                    cursor = conn.cursor()
+
+                    self._roll_up_mentions(cursor, f"SELECT * FROM {mentions}")
+
+                    # Mentions first: the posts partition can't be detached while rows reference it
+                    for table, partition in (("ticker_mentions", mentions), ("reddit_posts", posts)):
+                        cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {partition}")
+                        cursor.execute(f"DROP TABLE {partition}")
+
+                    cursor.close()
+
+                self._partition_months.discard(month)
+                dropped += 1
+                logger.info(f"Rolled up and dropped partitions for {month:%Y-%m}")
+
+            except Exception as e:
+                logger.error(f"Error dropping partitions for {month:%Y-%m}: {str(e)}")
+
+        try:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+
+                self._roll_up_mentions(cursor, "SELECT * FROM ticker_mentions_default WHERE created_utc < %s", (cutoff,))
+                cursor.execute("DELETE FROM ticker_mentions_default WHERE created_utc < %s", (cutoff,))
+                cursor.execute("DELETE FROM reddit_posts_default WHERE created_utc < %s", (cutoff,))
+                if cursor.rowcount:
+                    logger.info(f"Rolled up and deleted {cursor.rowcount} expired posts from the default partition")
+
+                cursor.close()
+
+        except Exception as e:
+            logger.error(f"Error expiring default partition rows: {str(e)}")
+
+        return dropped
+
+    def get_daily_sentiment_trends(self, days: int = 30, tickers: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Daily mention counts and average sentiment per ticker over the last `days` days.
+
+        Filters on ticker_mentions.created_utc directly so only the recent
+        monthly partitions are scanned.
+        """
+        since = datetime.now() - timedelta(days=days)
+
+        try:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+                cursor.execute("""
+                    SELECT
+                        ticker,
+                        date_trunc('day', created_utc) AS day,
+                        COUNT(*) AS mention_count,
+                        ROUND(AVG(sentiment_score), 2) AS avg_sentiment_score
+                    FROM ticker_mentions
+                    WHERE created_utc >= %s
+                      AND (%s::VARCHAR[] IS NULL OR ticker = ANY(%s::VARCHAR[]))
+                    GROUP BY ticker, day
+                    ORDER BY ticker, day
+                """, (since, tickers, tickers))
+                results = cursor.fetchall()
+                cursor.close()
+
+            return [dict(row) for row in results]
+
+        except Exception as e:
+            logger.error(f"Error getting daily sentiment trends: {str(e)}")
+            return []
+
+    def rebuild_ticker_stats(self) -> bool:
+        """
+        Rebuild ticker_mention_stats from scratch.
+
+        The load path keeps the table up to date; this is for backfilling an
+        existing database or repairing drift after manual edits.
+        """
+        try:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute("LOCK TABLE ticker_mention_stats IN EXCLUSIVE MODE")
+                cursor.execute("DELETE FROM ticker_mention_stats")
+                cursor.execute(f"""
+                    INSERT INTO ticker_mention_stats
+                        (ticker, mention_count, score_sum, positive_count, negative_count, neutral_count)
+                    SELECT {_TICKER_STATS_COLUMNS}
+                    FROM ticker_mentions
+                    GROUP BY ticker
+                """)
+                count = cursor.rowcount
+                cursor.close()
+
+            logger.info(f"Rebuilt ticker stats for {count} tickers")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error rebuilding ticker stats: {str(e)}")
+            return False
+
     def refresh_materialized_view(self):
         """
-        Refresh the materialized view
+        Refresh the materialized view.
+
+        Uses REFRESH ... CONCURRENTLY so readers are not blocked; the first
+        refresh of an unpopulated view has to be a plain one.
         """
         
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("REFRESH MATERIALIZED VIEW mv_ticker_mentions;")
-            conn.commit()
-            cursor.close()
-            conn.close()
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute("SELECT ispopulated FROM pg_matviews WHERE matviewname = 'mv_ticker_mentions'")
+                row = cursor.fetchone()
+
+                if row and row[0]:
+                    cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_ticker_mentions;")
+                else:
+                    cursor.execute("REFRESH MATERIALIZED VIEW mv_ticker_mentions;")
+                cursor.close()
             
             logger.info("Refreshed materialized view")
             return True
@@ -183,23 +1039,45 @@ class DatabaseOperations:
             logger.error(f"Error refreshing view: {str(e)}")
             return False
 
-    def get_dashboard_data(self) -> List[Dict[str, Any]]:
+    def bump_data_version(self) -> Optional[int]:
+        """
+        Mark that a pipeline run finished loading.
+
+        Dashboard caches are keyed on this version, so bumping it invalidates
+        them in every process. Returns the new version, or None on error.
+        """
+        try:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute("""
+                    INSERT INTO data_version (id, version, updated_at)
+                    VALUES (1, 1, CURRENT_TIMESTAMP)
+                    ON CONFLICT (id) DO UPDATE SET
+                        version = data_version.version + 1,
+                        updated_at = EXCLUDED.updated_at
+                    RETURNING version
+                """)
+                version = cursor.fetchone()[0]
+                cursor.close()
+
+            dashboard.invalidate()
+            logger.info(f"Bumped data version to {version}")
+            return version
+
+        except Exception as e:
+            logger.error(f"Error bumping data version: {str(e)}")
+            return None
+
+    def get_dashboard_data(self, limit: Optional[int] = None, days: Optional[int] = None, subreddit: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get data for dashboard:
-        - Top tickers by mention count
+        - Top tickers by mention count, optionally within the last `days` days
+          and/or one subreddit (cached; see load/dashboard.py)
         """
 
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            cursor.execute("SELECT * FROM mv_ticker_mentions ORDER BY mention_count DESC;")
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            return [dict(row) for row in results]
+            return dashboard.top_tickers(limit=limit, days=days, subreddit=subreddit)
             
         except Exception as e:
             logger.error(f"Error getting dashboard data: {str(e)}")
@@ -381,18 +1259,17 @@ class DatabaseOperations:
         Clean up test data by deleting the post and its ticker mentions
         """
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
             
-            # Delete ticker mentions first
-            cursor.execute("DELETE FROM ticker_mentions WHERE post_id = %s", (post_id,))
+                # Delete ticker mentions first
+                cursor.execute("DELETE FROM ticker_mentions WHERE post_id = %s RETURNING ticker", (post_id,))
+                _recompute_ticker_stats(cursor, [row[0] for row in cursor.fetchall()])
             
-            # Delete the post
-            cursor.execute("DELETE FROM reddit_posts WHERE id = %s", (post_id,))
+                # Delete the post
+                cursor.execute("DELETE FROM reddit_posts WHERE id = %s", (post_id,))
             
-            conn.commit()
-            cursor.close()
-            conn.close()
+                cursor.close()
             
             logger.info(f"Cleaned up test data for post ID: {post_id}")
             return True
@@ -406,15 +1283,13 @@ class DatabaseOperations:
         Clean up test stock data by deleting the stock data entries
         """
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
             
-            # Delete stock data for the ticker
-            cursor.execute("DELETE FROM stock_data WHERE ticker = %s", (ticker,))
+                # Delete stock data for the ticker
+                cursor.execute("DELETE FROM stock_data WHERE ticker = %s", (ticker,))
             
-            conn.commit()
-            cursor.close()
-            conn.close()
+                cursor.close()
             
             logger.info(f"Cleaned up test stock data for ticker: {ticker}")
             return True
@@ -428,15 +1303,13 @@ class DatabaseOperations:
         Clean up test news data by deleting the news articles entries
         """
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
             
-            # Delete news articles for the ticker
-            cursor.execute("DELETE FROM news_articles WHERE ticker = %s", (ticker,))
+                # Delete news articles for the ticker
+                cursor.execute("DELETE FROM news_articles WHERE ticker = %s", (ticker,))
             
-            conn.commit()
-            cursor.close()
-            conn.close()
+                cursor.close()
             
             logger.info(f"Cleaned up test news data for ticker: {ticker}")
             return True
@@ -0,0 +1,88 @@
+"""
+Check that parsing the pipeline DAG stays cheap.
+
+Imports dags/reddit_stock_pipeline_dag.py under `python -X importtime` in a
+fresh interpreter, with Airflow itself imported first so only the DAG file's
+own cost is counted. Fails if that cost is over the budget or if any heavy
+module (torch, PRAW, psycopg2, ...) was imported while parsing.
+
+Usage:
+    python scripts/check_dag_import_time.py [--budget-ms 200] [--top 15]
+
+tests/test_dag_import_time.py runs the heavy-module check as part of pytest.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAGS_DIR = os.path.join(ROOT, "dags")
+DAG_MODULE = "reddit_stock_pipeline_dag"
+
+# Modules that belong in task execution, never in DAG parsing
+HEAVY_MODULES = {
+    "torch", "transformers", "onnxruntime", "praw", "psycopg2",
+    "pyarrow", "pandas", "numpy", "requests", "cachetools",
+}
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure():
+    """Return [(module, self_us, cumulative_us)] for everything the DAG file imported"""
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, DAGS_DIR, env.get("PYTHONPATH")]))
+
+    code = f"import airflow, airflow.decorators; import {DAG_MODULE}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=DAGS_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"Importing {DAG_MODULE} failed:\n{result.stderr[-2000:]}")
+
+    # Airflow's own imports come first; everything after them belongs to the DAG file
+    lines = result.stderr.splitlines()
+    start = max((i for i, line in enumerate(lines) if line.endswith("| airflow.decorators")), default=-1) + 1
+
+    modules = []
+    for line in lines[start:]:
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, module = match.groups()
+            modules.append((module, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("DAG_IMPORT_BUDGET_MS", "200")))
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    modules = measure()
+    total_ms = sum(self_us for _, self_us, _ in modules) / 1000
+    heavy = sorted({m.split(".")[0] for m, _, _ in modules} & HEAVY_MODULES)
+
+    print(f"{DAG_MODULE} import time (excluding airflow): {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for module, _, cumulative_us in sorted(modules, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported at parse time: {', '.join(heavy)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: over budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
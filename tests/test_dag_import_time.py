@@ -0,0 +1,30 @@
+"""
+Parsing the pipeline DAG must not import any heavy module (see
+scripts/check_dag_import_time.py); the dag-processor re-parses it constantly.
+The time budget is left to the script, since it depends on the machine.
+"""
+import importlib.util
+import os
+
+import pytest
+
+pytest.importorskip("airflow")
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "check_dag_import_time.py")
+
+
+def _load_check():
+    spec = importlib.util.spec_from_file_location("check_dag_import_time", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_dag_parse_imports_no_heavy_modules():
+    check = _load_check()
+
+    modules = check.measure()
+    imported = {module.split(".")[0] for module, _, _ in modules}
+
+    assert check.DAG_MODULE in imported
+    assert not imported & check.HEAVY_MODULES, f"heavy modules imported at parse time: {sorted(imported & check.HEAVY_MODULES)}"
@@ -0,0 +1,96 @@
+"""
+The sentiment server going away mid-run must not lose scores: the client is
+dropped and the request is retried once on a local backend.
+"""
+import socket
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("cachetools")
+
+from transform import sentiment
+from transform.sentiment_server import MicroBatcher, _Handler
+
+
+def _score(label):
+    return lambda sentences, batch_size=16: [{"label": label, "score": 0.9} for _ in sentences]
+
+
+class LocalBackend:
+    name = "pytorch"
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, sentences, batch_size=16):
+        self.calls += 1
+        return _score("negative")(sentences)
+
+
+class DyingHandler(_Handler):
+    """Serves the first /predict normally, then dies in the middle of the next one"""
+
+    served = 0
+
+    def do_POST(self):
+        if DyingHandler.served == 0:
+            DyingHandler.served += 1
+            return super().do_POST()
+
+        # Read the request, then drop the connection without answering and stop the server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+        self.close_connection = True
+        self.connection.shutdown(socket.SHUT_RDWR)
+
+
+@pytest.fixture
+def dying_server():
+    DyingHandler.served = 0
+    handler = type("Handler", (DyingHandler,), {"batcher": MicroBatcher(_score("positive")), "backend_name": "pytorch"})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.server_close()
+
+
+def test_falls_back_to_local_backend_when_server_dies(dying_server, monkeypatch):
+    local = LocalBackend()
+    monkeypatch.setattr(sentiment, "server_url", dying_server)
+    monkeypatch.setattr(sentiment, "cache_enabled", False)
+    monkeypatch.setattr(sentiment, "load_backend", lambda model_id: local)
+    monkeypatch.setattr(sentiment, "_pipe", None)
+    monkeypatch.setattr(sentiment, "_server_failed", False)
+
+    # Served by the server
+    first = sentiment.get_ticker_sentiment_batch(["$AAPL is going up. Nothing else here."])
+    assert first[0]["AAPL"]["label"] == "positive"
+    assert local.calls == 0
+
+    # The server dies during this request; the whole batch is rescored locally
+    second = sentiment.get_ticker_sentiment_batch(["$TSLA is going down.", "I sold $GME today."])
+    assert second[0]["TSLA"]["label"] == "negative"
+    assert second[1]["GME"]["label"] == "negative"
+    assert local.calls == 1
+
+    # Later batches stay on the local backend
+    assert sentiment._pipe is local
+    sentiment.get_ticker_sentiment_batch(["$NVDA to the moon."])
+    assert local.calls == 2
+
+
+def test_local_backend_errors_are_not_swallowed(monkeypatch):
+    def broken(sentences, batch_size=16):
+        raise RuntimeError("model failed")
+
+    broken.name = "pytorch"
+    monkeypatch.setattr(sentiment, "server_url", "")
+    monkeypatch.setattr(sentiment, "cache_enabled", False)
+    monkeypatch.setattr(sentiment, "_pipe", broken)
+
+    with pytest.raises(RuntimeError):
+        sentiment.get_ticker_sentiment_batch(["$AAPL is going up."])
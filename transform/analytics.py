@@ -0,0 +1,244 @@
+import io
+import logging
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from configs.db_connection import db
+from configs.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+ROLLING_WINDOW_DAYS = 7
+ZSCORE_WINDOW_DAYS = 30
+CORRELATION_LAGS = (0, 1, 2, 3, 5)
+MIN_CORRELATION_PERIODS = 20
+
+# Daily returns are computed in Postgres with a window over each ticker's series
+_PRICES_QUERY = """
+    SELECT
+        ticker,
+        date,
+        close_price::FLOAT8 AS close,
+        volume,
+        close_price / NULLIF(LAG(close_price) OVER w, 0) - 1 AS daily_return
+    FROM stock_data
+    WHERE date >= %(since)s
+      AND (%(tickers)s::VARCHAR[] IS NULL OR ticker = ANY(%(tickers)s::VARCHAR[]))
+    WINDOW w AS (PARTITION BY ticker ORDER BY date)
+"""
+
+# Per ticker and day: mentions, average score and net sentiment ((positive - negative) / mentions),
+# from live partitions plus days already rolled up by retention
+_SENTIMENT_QUERY = """
+    SELECT
+        ticker,
+        day AS date,
+        SUM(mention_count) AS mention_count,
+        SUM(score_sum)::FLOAT8 / SUM(mention_count) AS avg_score,
+        (SUM(positive_count) - SUM(negative_count))::FLOAT8 / SUM(mention_count) AS net_sentiment
+    FROM (
+        SELECT
+            ticker,
+            created_utc::DATE AS day,
+            COUNT(*) AS mention_count,
+            COALESCE(SUM(sentiment_score), 0) AS score_sum,
+            COUNT(*) FILTER (WHERE sentiment_label = 'positive') AS positive_count,
+            COUNT(*) FILTER (WHERE sentiment_label = 'negative') AS negative_count
+        FROM ticker_mentions
+        WHERE created_utc >= %(since)s
+          AND (%(tickers)s::VARCHAR[] IS NULL OR ticker = ANY(%(tickers)s::VARCHAR[]))
+        GROUP BY ticker, day
+        UNION ALL
+        SELECT ticker, day, mention_count, score_sum, positive_count, negative_count
+        FROM ticker_daily_rollup
+        WHERE day >= %(since)s
+          AND (%(tickers)s::VARCHAR[] IS NULL OR ticker = ANY(%(tickers)s::VARCHAR[]))
+    ) AS daily
+    GROUP BY ticker, day
+"""
+
+
+def _read_frame(query: str, params: Dict, parse_dates: List[str]) -> pd.DataFrame:
+    """Run a query and read its result with COPY ... TO STDOUT, which is much faster than fetching rows"""
+
+    buffer = io.StringIO()
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        bound = cursor.mogrify(query, params).decode("utf-8")
+        cursor.copy_expert(f"COPY ({bound}) TO STDOUT WITH CSV HEADER", buffer)
+        cursor.close()
+
+    buffer.seek(0)
+    return pd.read_csv(buffer, parse_dates=parse_dates)
+
+
+def load_daily_data(tickers: Optional[Iterable[str]] = None, days: int = 365) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Load daily prices (with returns) and daily sentiment for the last `days` days.
+
+    Returns (prices, sentiment) as long frames keyed by ticker and date.
+    """
+    params = {
+        "since": date.today() - timedelta(days=days),
+        "tickers": list(tickers) if tickers is not None else None,
+    }
+
+    start = time.perf_counter()
+    prices = _read_frame(_PRICES_QUERY, params, parse_dates=["date"])
+    sentiment = _read_frame(_SENTIMENT_QUERY, params, parse_dates=["date"])
+    logger.info(
+        f"Loaded {len(prices)} price rows and {len(sentiment)} sentiment rows "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    return prices, sentiment
+
+
+def _columnwise_corr(a: pd.DataFrame, b: pd.DataFrame, min_periods: int) -> pd.Series:
+    """Pearson correlation of each column of `a` with the same column of `b`, over pairwise non-null rows"""
+
+    mask = a.notna() & b.notna()
+    a = a.where(mask)
+    b = b.where(mask)
+    n = mask.sum()
+
+    cov = ((a - a.mean()) * (b - b.mean())).sum() / (n - 1)
+    corr = cov / (a.std() * b.std())
+    return corr.where(n >= min_periods)
+
+
+def compute_signals(
+    prices: pd.DataFrame,
+    sentiment: pd.DataFrame,
+    rolling_window: int = ROLLING_WINDOW_DAYS,
+    zscore_window: int = ZSCORE_WINDOW_DAYS,
+    lags: Iterable[int] = CORRELATION_LAGS,
+    min_periods: int = MIN_CORRELATION_PERIODS,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Relate sentiment to price moves for every ticker at once.
+
+    Both inputs are pivoted into date x ticker matrices so each rolling
+    window and correlation runs once over all tickers:
+
+    - rolling_sentiment: mention-weighted net sentiment over the last
+      `rolling_window` calendar days (weekend posts count toward Monday)
+    - mention_zscore: today's mentions against the previous `zscore_window`
+      days' mean and standard deviation
+    - correlation of rolling sentiment on day t with the return on day t+lag,
+      per ticker and lag
+
+    Returns (daily, correlations): a long frame per ticker and trading day,
+    and a ticker x lag frame of correlations.
+    """
+    lags = list(lags)
+
+    # Calendar-day sentiment matrices; days without mentions count as zero mentions
+    counts = sentiment.pivot(index="date", columns="ticker", values="mention_count")
+    if counts.empty:
+        counts = pd.DataFrame(index=pd.DatetimeIndex([], name="date"))
+    else:
+        counts = counts.asfreq("D")
+    counts = counts.fillna(0.0)
+    weighted = (
+        sentiment.assign(weighted=sentiment["net_sentiment"] * sentiment["mention_count"])
+        .pivot(index="date", columns="ticker", values="weighted")
+        .reindex(index=counts.index, columns=counts.columns)
+        .fillna(0.0)
+    )
+
+    window_counts = counts.rolling(rolling_window, min_periods=1).sum()
+    rolling_sentiment = weighted.rolling(rolling_window, min_periods=1).sum() / window_counts.where(window_counts > 0)
+
+    history = counts.shift(1).rolling(zscore_window, min_periods=max(2, zscore_window // 2))
+    mention_zscore = (counts - history.mean()) / history.std().where(lambda std: std > 0)
+
+    # Trading-day price matrices
+    returns = prices.pivot(index="date", columns="ticker", values="daily_return").astype(float)
+    closes = prices.pivot(index="date", columns="ticker", values="close").astype(float)
+
+    tickers = returns.columns.union(counts.columns)
+    returns = returns.reindex(columns=tickers)
+    closes = closes.reindex(columns=tickers)
+    on_trading_days = {
+        "mention_count": counts.reindex(index=returns.index, columns=tickers),
+        "rolling_sentiment": rolling_sentiment.reindex(index=returns.index, columns=tickers),
+        "mention_zscore": mention_zscore.reindex(index=returns.index, columns=tickers),
+    }
+
+    correlations = pd.DataFrame(
+        {
+            f"lag_{lag}": _columnwise_corr(on_trading_days["rolling_sentiment"], returns.shift(-lag), min_periods)
+            for lag in lags
+        },
+        index=tickers,
+    )
+    correlations.index.name = "ticker"
+
+    daily = pd.concat(
+        {"close": closes, "daily_return": returns, **on_trading_days},
+        axis=1,
+    ).stack(level=1, future_stack=True)
+    daily = daily.dropna(subset=["close"]).reset_index()
+    daily = daily[["ticker", "date", *daily.columns.drop(["ticker", "date"])]]
+
+    return daily, correlations
+
+
+def run_analytics(tickers: Optional[Iterable[str]] = None, days: int = 365, **kwargs) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Load the last `days` days from the database and compute signals (see compute_signals)"""
+
+    prices, sentiment = load_daily_data(tickers, days)
+
+    start = time.perf_counter()
+    daily, correlations = compute_signals(prices, sentiment, **kwargs)
+    logger.info(f"Computed signals for {correlations.shape[0]} tickers in {time.perf_counter() - start:.2f}s")
+
+    return daily, correlations
+
+
+def _synthetic_data(ticker_count: int, day_count: int, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Random prices and sentiment shaped like the output of load_daily_data"""
+
+    rng = np.random.default_rng(seed)
+    tickers = [f"T{i:04d}" for i in range(ticker_count)]
+    calendar = pd.date_range("2022-01-01", periods=day_count, freq="D")
+    trading_days = calendar[calendar.dayofweek < 5]
+
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(trading_days), ticker_count)), axis=0))
+    prices = pd.DataFrame({
+        "ticker": np.tile(tickers, len(trading_days)),
+        "date": np.repeat(trading_days, ticker_count),
+        "close": close.ravel(),
+        "volume": rng.integers(1_000, 1_000_000, close.size),
+    })
+    prices["daily_return"] = prices.groupby("ticker")["close"].pct_change()
+
+    # Sparse mentions: each ticker is discussed on ~30% of days
+    mentioned = rng.random((day_count, ticker_count)) < 0.3
+    day_index, ticker_index = np.nonzero(mentioned)
+    sentiment = pd.DataFrame({
+        "ticker": np.asarray(tickers)[ticker_index],
+        "date": calendar[day_index],
+        "mention_count": rng.integers(1, 50, day_index.size),
+        "avg_score": rng.uniform(0.5, 1.0, day_index.size),
+        "net_sentiment": rng.uniform(-1, 1, day_index.size),
+    })
+
+    return prices, sentiment
+
+
+if __name__ == "__main__":
+    # Benchmark on synthetic data: thousands of tickers x years of days
+    prices, sentiment = _synthetic_data(ticker_count=2000, day_count=3 * 365)
+    print(f"{len(prices)} price rows, {len(sentiment)} sentiment rows")
+
+    start = time.perf_counter()
+    daily, correlations = compute_signals(prices, sentiment)
+    print(f"compute_signals: {time.perf_counter() - start:.2f}s")
+    print(daily.tail())
+    print(correlations.describe())
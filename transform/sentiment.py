@@ -1,81 +1,170 @@
-from transformers import pipeline
 from typing import List, Dict
-from collections import defaultdict
 import logging
-import torch
-import re
+import os
 
-from extract.reddit_data import get_subreddit_data
-from extract.ticker_symbols import extract_ticker_symbols
+from extract.ticker_symbols import extract_ticker_sentences
+from transform.sentiment_cache import sentiment_cache
+from transform.sentiment_backends import load_backend, backend_name
+from transform.sentiment_server import SentimentClient, server_url
 from configs.logging_config import setup_logging
 
-# Setup logging and device
+# Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
-device = 0 if torch.cuda.is_available() else -1
-logger.info(f"Using device: {'cuda:0' if device == 0 else 'CPU'}")
+MODEL_ID = "ProsusAI/finbert"
+
+cache_enabled = os.getenv("SENTIMENT_CACHE_ENABLED", "true").lower() == "true"
 
 _pipe = None
+# Set once the sentiment server fails mid-run; the process then stays on a local backend
+_server_failed = False
+
+# Sentences per request when scoring through a backend without a tokenizer (the sentiment server)
+BATCH_SIZE = 64
+
+# Local backends batch by padded tokens (sentences x longest sentence) instead of a fixed count
+TOKEN_BUDGET = int(os.getenv("SENTIMENT_TOKEN_BUDGET", "8192"))
+MAX_BATCH_SENTENCES = int(os.getenv("SENTIMENT_MAX_BATCH_SENTENCES", "256"))
 
 def _get_pipeline():
-    """Get or create the sentiment analysis pipeline (lazy loading)"""
+    """
+    Get or create the sentiment analysis backend (lazy loading).
+
+    Uses the sentiment server when SENTIMENT_SERVER_URL is set and it answers
+    its health check, so tasks skip loading the model themselves. The server
+    should run the same SENTIMENT_BACKEND.
+    """
     global _pipe
+    if _pipe is None and server_url and not _server_failed:
+        client = SentimentClient(server_url)
+        health = client.health()
+        if health:
+            logger.info(f"Using sentiment server at {server_url} ({health.get('backend')} backend)")
+            # Report the server's backend so its results are cached under the right model id
+            client.name = health.get("backend") or client.name
+            _pipe = client
+
     if _pipe is None:
-        logger.info("Loading FinBERT model...")
-        _pipe = pipeline(
-            "text-classification",
-            model="ProsusAI/finbert",
-            device=device
-        )
-        logger.info("FinBERT model loaded successfully")
+        logger.info(f"Loading FinBERT model ({backend_name} backend)...")
+        _pipe = load_backend(MODEL_ID)
+        logger.info(f"FinBERT model loaded successfully ({_pipe.name} backend)")
     return _pipe
 
 
-def _split_sentences(text: str) -> List[str]:
-    """Split text into sentences using regex"""
+def _fall_back_to_local(error: Exception):
+    """Drop the sentiment server client after a failed request and use a local backend from now on"""
 
-    # Split on common sentence endings
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if s.strip()]
+    global _pipe, _server_failed
+    logger.error(f"Sentiment server request failed, falling back to a local backend: {str(error)}")
+    _server_failed = True
+    _pipe = None
+    return _get_pipeline()
 
-    return sentences
 
+def _cache_model_id(name: str) -> str:
+    """
+    Sentence cache key for a backend name. Quantized / ONNX results can differ
+    slightly from fp32, so they are cached separately.
+    """
+    return MODEL_ID if name == "pytorch" else f"{MODEL_ID}:{name}"
 
-def get_ticker_sentiment(text: str) -> Dict[str, Dict]:
+
+def _plan_batches(lengths: List[int], token_budget: int = TOKEN_BUDGET, max_batch: int = MAX_BATCH_SENTENCES) -> List[List[int]]:
     """
-    For each ticker in the text, find all sentences mentioning it and
-    average the sentiment scores from FinBERT.
+    Group sentence indices into batches by token length.
 
-    Returns a dict of:
-        {
-            "AAPL": {"label": "positive", "score": 0.87},
-            ...
-        }
+    Sentences are sorted by length and packed greedily while the padded
+    batch (count x longest length) fits in `token_budget`, so short
+    sentences share large batches and long ones get small batches of their own.
     """
-    tickers = extract_ticker_symbols(text)
-    if not tickers:
-        return {}
+    batches = []
+    batch = []
+
+    for index in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Sorted ascending, so the new sentence is the longest in the batch
+        if batch and (len(batch) >= max_batch or (len(batch) + 1) * lengths[index] > token_budget):
+            batches.append(batch)
+            batch = []
+        batch.append(index)
+
+    if batch:
+        batches.append(batch)
 
-    sentences = _split_sentences(text)
-
-    # Map tickers to the sentences that mention them
-    ticker_sentences = defaultdict(list)
-    for sentence in sentences:
-        for ticker in tickers:
-            if ticker in sentence or f"${ticker}" in sentence:
-                ticker_sentences[ticker].append(sentence)
-    
-    # Analyze sentiment for all sentences
-    all_sentences = list({sentence for sentences in ticker_sentences.values() for sentence in sentences})
-    if not all_sentences:
+    return batches
+
+
+def predict_sentences(pipe, sentences: List[str]) -> List[Dict]:
+    """
+    Score sentences with a backend, aligned with the input order.
+
+    Local backends tokenize everything once and run length-bucketed batches
+    under the token budget; anything else (e.g. the server client) gets the
+    plain sentence list.
+    """
+    if not hasattr(pipe, "encode"):
+        return pipe(sentences, batch_size=BATCH_SIZE)
+
+    ids = pipe.encode(sentences)
+    results = [None] * len(sentences)
+
+    for batch in _plan_batches([len(tokens) for tokens in ids]):
+        for index, result in zip(batch, pipe.predict_ids([ids[i] for i in batch])):
+            results[index] = result
+
+    return results
+
+
+def _score_sentences(sentences: List[str]) -> Dict[str, Dict]:
+    """
+    Run FinBERT over a list of sentences and return results keyed by sentence.
+
+    Sentences are deduplicated and looked up in the sentence cache first; the
+    rest are scored in length-bucketed batches (see predict_sentences).
+    """
+    unique_sentences = set(sentences)
+    if not unique_sentences:
         return {}
 
-    pipe = _get_pipeline()
-    results = pipe(all_sentences, batch_size=16)
-    sent_results = {s: r for s, r in zip(all_sentences, results)}
+    # Serve previously scored sentences from the cache. Until a backend is
+    # needed, the key comes from configuration, so fully cached batches never
+    # load the model or contact the sentiment server
+    cache_model_id = _cache_model_id(_pipe.name if _pipe is not None else backend_name)
+    sent_results = sentiment_cache.get_many(unique_sentences, cache_model_id) if cache_enabled else {}
+    to_score = list(unique_sentences - sent_results.keys())
+
+    if to_score:
+        pipe = _get_pipeline()
+
+        # load_backend fell back to fp32 (or the server runs another backend): re-key the lookup
+        if _cache_model_id(pipe.name) != cache_model_id:
+            cache_model_id = _cache_model_id(pipe.name)
+            sent_results = sentiment_cache.get_many(unique_sentences, cache_model_id) if cache_enabled else {}
+            to_score = list(unique_sentences - sent_results.keys())
+
+        try:
+            results = predict_sentences(pipe, to_score)
+        except Exception as e:
+            if not isinstance(pipe, SentimentClient):
+                raise
+
+            # Retry the whole request once locally; a second failure propagates
+            pipe = _fall_back_to_local(e)
+            cache_model_id = _cache_model_id(pipe.name)
+            results = predict_sentences(pipe, to_score)
+
+        scored = {s: r for s, r in zip(to_score, results)}
+
+        if cache_enabled:
+            sentiment_cache.put_many(scored, cache_model_id)
+        sent_results.update(scored)
+
+    return sent_results
+
+
+def _aggregate_sentiment(ticker_sentences: Dict[str, List[str]], sent_results: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Average the sentence scores for each ticker and pick the top label"""
 
-    # Compute average sentiment for each ticker
     final = {}
     for ticker, sentences in ticker_sentences.items():
         agg = {
@@ -102,8 +191,104 @@ def get_ticker_sentiment(text: str) -> Dict[str, Dict]:
     return final
 
 
+def get_ticker_sentiment_batch(texts: List[str]) -> List[Dict[str, Dict]]:
+    """
+    Batched version of get_ticker_sentiment for many posts at once.
+
+    Sentences from all texts are deduplicated and scored together, then the
+    results are scattered back to each text.
+
+    Returns a list aligned with `texts`, each item in the same format as
+    get_ticker_sentiment.
+    """
+    mappings = [extract_ticker_sentences(text) for text in texts]
+
+    all_sentences = [
+        sentence
+        for ticker_sentences in mappings
+        for sentences in ticker_sentences.values()
+        for sentence in sentences
+    ]
+
+    sent_results = _score_sentences(all_sentences)
+    logger.info(f"Scored {len(sent_results)} unique sentences from {len(texts)} texts")
+
+    return [
+        _aggregate_sentiment(ticker_sentences, sent_results) if ticker_sentences else {}
+        for ticker_sentences in mappings
+    ]
+
+
+def get_ticker_sentiment(text: str) -> Dict[str, Dict]:
+    """
+    For each ticker in the text, find all sentences mentioning it and
+    average the sentiment scores from FinBERT.
+
+    Returns a dict of:
+        {
+            "AAPL": {"label": "positive", "score": 0.87},
+            ...
+        }
+    """
+    return get_ticker_sentiment_batch([text])[0]
+
+
+def _synthetic_corpus(count: int, seed: int = 0) -> List[str]:
+    """Reddit-like sentences: mostly short, some medium, a few very long unpunctuated rants"""
+    import random
+
+    rng = random.Random(seed)
+    words = (
+        "the stock is going to moon calls puts earnings guidance revenue beat missed bagholders "
+        "diamond hands yolo dip buy sell hold short squeeze shares market fed rates inflation "
+        "AAPL TSLA GME NVDA AMD MSFT $SPY $AMC I think this honestly not financial advice lol"
+    ).split()
+
+    corpus = []
+    for _ in range(count):
+        roll = rng.random()
+        length = rng.randint(4, 20) if roll < 0.8 else rng.randint(20, 60) if roll < 0.95 else rng.randint(150, 500)
+        corpus.append(" ".join(rng.choice(words) for _ in range(length)))
+    return corpus
+
+
+def _benchmark(sentences: List[str]):
+    """
+    Compare the stock Hugging Face pipeline (fixed batch_size=16 in arrival order,
+    what this module used before) with the configured backend and token-budget buckets
+    """
+    import time
+    from transformers import pipeline
+
+    baseline_pipe = pipeline("sentiment-analysis", model=MODEL_ID)
+
+    # truncation: the corpus has rants past FinBERT's 512-token limit
+    start = time.perf_counter()
+    baseline = baseline_pipe(sentences, batch_size=16, truncation=True)
+    baseline_rate = len(sentences) / (time.perf_counter() - start)
+
+    pipe = _get_pipeline()
+
+    start = time.perf_counter()
+    bucketed = predict_sentences(pipe, sentences)
+    bucketed_rate = len(sentences) / (time.perf_counter() - start)
+
+    agree = sum(a["label"].lower() == b["label"].lower() for a, b in zip(baseline, bucketed)) / len(sentences)
+    print(f"HF pipeline, batch_size=16:   {baseline_rate:.1f} sentences/sec")
+    print(f"{pipe.name}, token budget {TOKEN_BUDGET}: {bucketed_rate:.1f} sentences/sec ({bucketed_rate / baseline_rate:.2f}x)")
+    print(f"label agreement: {agree:.3f}")
+
+
 if __name__ == "__main__":
+    import sys
+
+    if "--benchmark" in sys.argv:
+        _benchmark(_synthetic_corpus(2000))
+        sys.exit(0)
+
     # Testing
+    from extract.reddit_data import get_subreddit_data
+
     subreddit = "investing"
     limit = 2
 
@@ -0,0 +1,266 @@
+from typing import List, Dict, Optional
+import numpy as np
+import logging
+import os
+
+from configs.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+backend_name = os.getenv("SENTIMENT_BACKEND", "pytorch")
+onnx_dir = os.getenv("SENTIMENT_ONNX_DIR", "cache/finbert-onnx")
+parity_check = os.getenv("SENTIMENT_PARITY_CHECK", "false").lower() == "true"
+parity_threshold = float(os.getenv("SENTIMENT_PARITY_THRESHOLD", "1.0"))
+
+MAX_LENGTH = 512
+
+# Sentences longer than this many tokens keep their first max_tokens tokens
+max_tokens = min(int(os.getenv("SENTIMENT_MAX_TOKENS", str(MAX_LENGTH))), MAX_LENGTH)
+
+# Fixed sample set for comparing a backend's labels against the fp32 model
+PARITY_SAMPLES = [
+    "AAPL beat earnings expectations and raised guidance for next quarter",
+    "TSLA shares plunged after the company missed delivery estimates",
+    "MSFT will report earnings on Tuesday after the close",
+    "I'm loading up on NVDA calls, this thing is going to the moon",
+    "GME is a dumpster fire and bagholders are going to get wiped out",
+    "Not financial advice",
+    "The Fed kept interest rates unchanged at its latest meeting",
+    "AMD lost market share to Intel in the server segment this year",
+    "Revenue grew 25% year over year while margins expanded",
+    "The company announced layoffs of 10% of its workforce",
+    "Shares were flat in pre-market trading",
+    "Analysts upgraded the stock to buy with a $200 price target",
+]
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class SentimentBackend:
+    """
+    FinBERT inference backend.
+
+    Instances are called like a transformers text-classification pipeline:
+    backend(sentences, batch_size=16) returns one {"label", "score"} dict per
+    sentence with the top label and its probability.
+
+    torch / transformers are imported when a backend is created, so importing
+    this module stays cheap.
+    """
+
+    name = "base"
+
+    def __init__(self, model_id: str):
+        from transformers import AutoTokenizer
+
+        self.model_id = model_id
+        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
+        self.id2label = {}
+
+    def _logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        raise NotImplementedError
+
+    def encode(self, sentences: List[str]) -> List[List[int]]:
+        """
+        Tokenize sentences once, without padding.
+
+        Overlong sentences are truncated to their first `max_tokens` tokens
+        (special tokens included), so a long rant always scores on its opening.
+        """
+        return self.tokenizer(list(sentences), truncation=True, max_length=max_tokens)["input_ids"]
+
+    def predict_ids(self, batch: List[List[int]]) -> List[Dict]:
+        """Score one batch of token ids, padded only to its longest member"""
+
+        encoded = self.tokenizer.pad({"input_ids": batch}, padding=True, return_tensors="np")
+        if "token_type_ids" in self.tokenizer.model_input_names and "token_type_ids" not in encoded:
+            encoded["token_type_ids"] = np.zeros_like(encoded["input_ids"])
+
+        probs = _softmax(self._logits(encoded))
+        top = probs.argmax(axis=-1)
+
+        return [
+            {"label": self.id2label[int(label_id)], "score": float(probs[row, label_id])}
+            for row, label_id in enumerate(top)
+        ]
+
+    def __call__(self, sentences: List[str], batch_size: int = 16) -> List[Dict]:
+        ids = self.encode(sentences)
+
+        results = []
+        for i in range(0, len(ids), batch_size):
+            results.extend(self.predict_ids(ids[i:i + batch_size]))
+
+        return results
+
+
+class TorchBackend(SentimentBackend):
+    """Full-precision PyTorch model (GPU if available)"""
+
+    name = "pytorch"
+
+    def __init__(self, model_id: str):
+        import torch
+
+        super().__init__(model_id)
+        self.device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+        self.model = self._load_model().to(self.device).eval()
+        self.id2label = {int(k): v.lower() for k, v in self.model.config.id2label.items()}
+
+    def _load_model(self):
+        from transformers import AutoModelForSequenceClassification
+
+        return AutoModelForSequenceClassification.from_pretrained(self.model_id)
+
+    def _logits(self, encoded):
+        import torch
+
+        inputs = {k: torch.from_numpy(v).to(self.device) for k, v in encoded.items()}
+        with torch.inference_mode():
+            return self.model(**inputs).logits.float().cpu().numpy()
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """Dynamic INT8 quantization of the Linear layers; CPU only"""
+
+    name = "quantized"
+
+    def __init__(self, model_id: str):
+        import torch
+
+        SentimentBackend.__init__(self, model_id)
+        self.device = torch.device("cpu")
+        model = self._load_model().eval()
+        self.model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.id2label = {int(k): v.lower() for k, v in model.config.id2label.items()}
+
+
+class OnnxBackend(SentimentBackend):
+    """ONNX Runtime on CPU; the model is exported to onnx_dir on first use"""
+
+    name = "onnx"
+
+    def __init__(self, model_id: str, export_dir: str = onnx_dir):
+        import onnxruntime
+        from transformers import AutoModelForSequenceClassification
+
+        super().__init__(model_id)
+        model = AutoModelForSequenceClassification.from_pretrained(model_id).eval()
+        self.id2label = {int(k): v.lower() for k, v in model.config.id2label.items()}
+
+        path = os.path.join(export_dir, "model.onnx")
+        if not os.path.exists(path):
+            self._export(model, path)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _export(self, model, path: str):
+        import torch
+
+        logger.info(f"Exporting {self.model_id} to ONNX at {path}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        sample = self.tokenizer(["export sample"], return_tensors="pt")
+        input_names = list(sample.keys())
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["logits"] = {0: "batch"}
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with torch.inference_mode():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                tmp_path,
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=17,
+                dynamo=False,
+            )
+        os.replace(tmp_path, path)
+
+    def _logits(self, encoded):
+        inputs = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        return self.session.run(["logits"], inputs)[0]
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    QuantizedTorchBackend.name: QuantizedTorchBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def check_parity(backend: SentimentBackend, reference: Optional[SentimentBackend] = None, sentences: List[str] = PARITY_SAMPLES) -> Dict[str, float]:
+    """
+    Compare a backend's labels and scores with the fp32 PyTorch model.
+
+    Returns a dict with the label agreement rate and the largest score difference.
+    """
+    reference = reference or TorchBackend(backend.model_id)
+
+    expected = reference(sentences)
+    actual = backend(sentences)
+
+    agree = 0
+    max_diff = 0.0
+    for sentence, exp, act in zip(sentences, expected, actual):
+        if exp["label"] == act["label"]:
+            agree += 1
+            max_diff = max(max_diff, abs(exp["score"] - act["score"]))
+        else:
+            logger.warning(f"{backend.name} disagrees on '{sentence}': {act['label']} vs {exp['label']}")
+
+    report = {"agreement": agree / len(sentences), "max_score_diff": max_diff}
+    logger.info(f"Parity of {backend.name} backend vs fp32: {report}")
+    return report
+
+
+def load_backend(model_id: str, name: str = backend_name) -> SentimentBackend:
+    """
+    Load the configured inference backend.
+
+    Falls back to the fp32 PyTorch model if the backend cannot be loaded or,
+    when SENTIMENT_PARITY_CHECK is enabled, if its labels disagree with fp32
+    on the sample set.
+    """
+    if name not in BACKENDS:
+        logger.error(f"Unknown sentiment backend '{name}', using pytorch")
+        name = TorchBackend.name
+
+    try:
+        backend = BACKENDS[name](model_id)
+    except Exception as e:
+        logger.error(f"Could not load {name} sentiment backend, using pytorch: {str(e)}")
+        return TorchBackend(model_id)
+
+    if parity_check and name != TorchBackend.name:
+        reference = TorchBackend(model_id)
+        if check_parity(backend, reference)["agreement"] < parity_threshold:
+            logger.error(f"{name} backend failed the parity check, using pytorch")
+            return reference
+
+    return backend
+
+
+if __name__ == "__main__":
+    # Testing: compare every backend against fp32
+    import time
+
+    reference = TorchBackend("ProsusAI/finbert")
+    for name in (QuantizedTorchBackend.name, OnnxBackend.name):
+        backend = BACKENDS[name]("ProsusAI/finbert")
+        print(name, check_parity(backend, reference))
+
+        sentences = PARITY_SAMPLES * 20
+        for candidate in (reference, backend):
+            start = time.perf_counter()
+            candidate(sentences, batch_size=32)
+            print(f"  {candidate.name}: {len(sentences) / (time.perf_counter() - start):.1f} sentences/sec")
@@ -0,0 +1,176 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional
+
+from cachetools import LRUCache
+
+from configs.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+cache_path = os.getenv("SENTIMENT_CACHE_PATH", "cache/sentiment_cache.sqlite")
+memory_size = int(os.getenv("SENTIMENT_CACHE_MEMORY_SIZE", "50000"))
+
+# SQLite limits the number of bound parameters per statement
+_SQLITE_CHUNK = 500
+
+
+def _normalize(sentence: str) -> str:
+    """Collapse whitespace and lowercase (FinBERT is uncased)"""
+
+    return re.sub(r"\s+", " ", sentence).strip().lower()
+
+
+class SentimentCache:
+    """
+    Content-addressed cache of sentence-level FinBERT results.
+
+    Keys are the sha256 of the model id and the normalized sentence. Lookups
+    go to an in-memory LRU first, then to a SQLite file on disk.
+    """
+
+    def __init__(self, path: str = cache_path, max_memory_entries: int = memory_size):
+        self.path = path
+        self._memory = LRUCache(maxsize=max_memory_entries)
+        self._lock = threading.Lock()
+        self._conn = None
+        self.reset_stats()
+
+    def _get_conn(self) -> Optional[sqlite3.Connection]:
+        """Open the on-disk store lazily; returns None if it is unavailable"""
+
+        if self._conn is None:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS sentence_sentiment (
+                        key TEXT PRIMARY KEY,
+                        label TEXT NOT NULL,
+                        score REAL NOT NULL
+                    )
+                    """
+                )
+                self._conn.commit()
+            except Exception as e:
+                logger.error(f"Sentiment cache disk store unavailable at {self.path}: {str(e)}")
+                self._conn = None
+
+        return self._conn
+
+    @staticmethod
+    def make_key(sentence: str, model_id: str) -> str:
+        """Hash of the model id and the normalized sentence"""
+
+        return hashlib.sha256(f"{model_id}\0{_normalize(sentence)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, sentences: Iterable[str], model_id: str) -> Dict[str, Dict]:
+        """
+        Look up cached results for the given sentences.
+
+        Returns a dict of sentence -> {"label": ..., "score": ...} for hits only.
+        """
+        found = {}
+        missing = {}
+
+        with self._lock:
+            for sentence in sentences:
+                key = self.make_key(sentence, model_id)
+                result = self._memory.get(key)
+                if result is not None:
+                    found[sentence] = result
+                    self.memory_hits += 1
+                else:
+                    missing.setdefault(key, []).append(sentence)
+
+            conn = self._get_conn()
+            if missing and conn is not None:
+                keys = list(missing)
+                for i in range(0, len(keys), _SQLITE_CHUNK):
+                    chunk = keys[i:i + _SQLITE_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT key, label, score FROM sentence_sentiment WHERE key IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+
+                    for key, label, score in rows:
+                        result = {"label": label, "score": score}
+                        self._memory[key] = result
+                        for sentence in missing.pop(key):
+                            found[sentence] = result
+                            self.disk_hits += 1
+
+            self.misses += sum(len(s) for s in missing.values())
+
+        return found
+
+    def put_many(self, results: Dict[str, Dict], model_id: str):
+        """Store sentence -> {"label": ..., "score": ...} results in both tiers"""
+
+        rows = []
+        with self._lock:
+            for sentence, result in results.items():
+                key = self.make_key(sentence, model_id)
+                value = {"label": result["label"], "score": float(result["score"])}
+                self._memory[key] = value
+                rows.append((key, value["label"], value["score"]))
+
+            conn = self._get_conn()
+            if rows and conn is not None:
+                try:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO sentence_sentiment (key, label, score) VALUES (?, ?, ?)",
+                        rows,
+                    )
+                    conn.commit()
+                except Exception as e:
+                    logger.error(f"Error writing to sentiment cache: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters since the last reset"""
+
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+    def reset_stats(self):
+        """Reset hit/miss counters, e.g. at the start of a DAG run"""
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def close(self):
+        """Close the on-disk store"""
+
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+sentiment_cache = SentimentCache()
+
+
+if __name__ == "__main__":
+    # Testing
+    cache = SentimentCache(path="cache/test_sentiment_cache.sqlite", max_memory_entries=2)
+    cache.put_many({"Not financial advice": {"label": "neutral", "score": 0.91}}, "test-model")
+    print(cache.get_many(["not  financial advice ", "AAPL to the moon"], "test-model"))
+    print(cache.stats())
@@ -0,0 +1,186 @@
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from functools import partial
+from typing import Callable, List, Dict, Optional, Tuple
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import requests
+
+from configs.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+server_host = os.getenv("SENTIMENT_SERVER_HOST", "127.0.0.1")
+server_port = int(os.getenv("SENTIMENT_SERVER_PORT", "8765"))
+server_url = os.getenv("SENTIMENT_SERVER_URL", "")
+max_batch = int(os.getenv("SENTIMENT_SERVER_MAX_BATCH", "64"))
+max_wait_ms = float(os.getenv("SENTIMENT_SERVER_MAX_WAIT_MS", "10"))
+client_timeout = float(os.getenv("SENTIMENT_SERVER_TIMEOUT", "300"))
+
+
+class MicroBatcher:
+    """
+    Queue in front of a sentiment backend.
+
+    Requests from concurrent callers are collected for up to `max_wait_ms`
+    (or until `max_batch` sentences are waiting) and scored in one call, so
+    many small requests share forward passes instead of running one by one.
+    `score` takes a list of sentences and returns results in the same order.
+    """
+
+    def __init__(self, score: Callable[[List[str]], List[Dict]], max_batch: int = max_batch, max_wait_ms: float = max_wait_ms):
+        self.score = score
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.requests: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, sentences: List[str]) -> List[Dict]:
+        """Score sentences, blocking until their batch has run"""
+
+        if not sentences:
+            return []
+
+        future = Future()
+        self.requests.put((sentences, future))
+        return future.result()
+
+    def _collect(self) -> List[Tuple[List[str], Future]]:
+        pending = [self.requests.get()]
+        waiting = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+
+        while waiting < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            waiting += len(item[0])
+
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+
+            # Score each distinct sentence once across all waiting requests
+            unique = list({s for sentences, _ in pending for s in sentences})
+            try:
+                results = dict(zip(unique, self.score(unique)))
+            except Exception as e:
+                logger.error(f"Error scoring batch of {len(unique)} sentences: {str(e)}")
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            for sentences, future in pending:
+                future.set_result([results[s] for s in sentences])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Set on the server class by serve()
+    batcher: MicroBatcher = None
+    backend_name: str = ""
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "backend": self.backend_name})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            sentences = json.loads(self.rfile.read(length))["sentences"]
+        except Exception as e:
+            self._send_json(400, {"error": f"invalid request: {str(e)}"})
+            return
+
+        try:
+            self._send_json(200, {"results": self.batcher.submit(sentences)})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def serve(host: str = server_host, port: int = server_port):
+    """Load the model once and serve /predict and /health until interrupted"""
+
+    from transform.sentiment import MODEL_ID, predict_sentences
+    from transform.sentiment_backends import load_backend
+
+    logger.info("Loading FinBERT model for sentiment server...")
+    pipe = load_backend(MODEL_ID)
+
+    handler = type("Handler", (_Handler,), {"batcher": MicroBatcher(partial(predict_sentences, pipe)), "backend_name": pipe.name})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    httpd.daemon_threads = True
+
+    logger.info(f"Sentiment server ({pipe.name} backend) listening on {host}:{port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+class SentimentClient:
+    """
+    Thin client for the sentiment server.
+
+    Called like a local backend: client(sentences, batch_size=...) returns one
+    {"label", "score"} dict per sentence. Batching is left to the server.
+    """
+
+    name = "remote"
+
+    def __init__(self, url: str = server_url, timeout: float = client_timeout):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def health(self) -> Optional[Dict]:
+        """Server health payload, or None if it cannot be reached"""
+
+        try:
+            response = self.session.get(f"{self.url}/health", timeout=2)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            logger.warning(f"Sentiment server at {self.url} is not available: {str(e)}")
+            return None
+
+    def __call__(self, sentences: List[str], batch_size: int = 16) -> List[Dict]:
+        response = self.session.post(f"{self.url}/predict", json={"sentences": list(sentences)}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["results"]
+
+
+if __name__ == "__main__":
+    serve()